@@ -0,0 +1,47 @@
+import os
+import threading
+from collections import OrderedDict
+
+# --- Process-wide LRU cache for rendered artifacts ---
+# Figures and serialized downloads are keyed by (dataset fingerprint, filter
+# state, chart spec). Streamlit reruns the whole script on every widget
+# interaction, so unchanged charts and payloads are served from here instead
+# of being rebuilt; the least recently used entries are evicted first.
+MAX_ENTRIES = int(os.environ.get("URBAN_ARTIFACT_CACHE_SIZE", 64))
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def get(key, default=None):
+    with _lock:
+        if key in _entries:
+            _entries.move_to_end(key)
+            stats["hits"] += 1
+            return _entries[key]
+        stats["misses"] += 1
+    return default
+
+
+def get_or_build(key, build):
+    missing = object()
+    value = get(key, missing)
+    if value is missing:
+        value = build()
+        put(key, value)
+    return value
+
+
+def put(key, value):
+    with _lock:
+        _entries[key] = value
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            stats["evictions"] += 1
+
+
+def clear():
+    with _lock:
+        _entries.clear()
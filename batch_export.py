@@ -0,0 +1,87 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import cleaning
+import data_loader
+import excel_export
+import indicators
+
+# --- Headless batch export ---
+# Writes one workbook (a sheet per dataset) and one CSV per dataset for every
+# country, with the same cleaning and conditional formatting as the Python /
+# Excel page. Countries are fanned out over a process pool, one workbook per
+# task. Run with: python batch_export.py --out exports
+DATASETS = ["primary", "secondary"]
+
+
+def clean_for_export(dataset, typed):
+    # The page's cleaned export frame, keeping Country Code for the split;
+    # typed is the registry-typed parse (data_loader.load_indicators)
+    df = typed.rename(columns=indicators.PAGE_ID_NAMES)
+    columns = [c for c in indicators.names(dataset) if c in df.columns]
+    df, _ = cleaning.run_pipeline(df, cleaning.export_pipeline(dataset, columns), copy=False)
+    return df.round({c: 3 for c in columns})
+
+
+def export_country(country, frames, out_dir, formats):
+    # One country's outputs; frames maps dataset -> that country's rows
+    start = time.perf_counter()
+    paths = []
+    if "csv" in formats:
+        for dataset, df in frames.items():
+            paths.append(os.path.join(out_dir, f"{country}_{dataset}_cleaned.csv"))
+            df.to_csv(paths[-1], index=False)
+    if "xlsx" in formats:
+        paths.append(os.path.join(out_dir, f"{country}_cleaned_conditional.xlsx"))
+        excel_export.write_workbook(paths[-1], frames)
+    written = sum(os.path.getsize(p) for p in paths)
+    rows = sum(len(df) for df in frames.values())
+    return country, rows, written, time.perf_counter() - start
+
+
+def country_frames(datasets, countries=None):
+    # {country code: {dataset: frame}} from the cleaned sources
+    by_country = {}
+    for dataset in datasets:
+        df = clean_for_export(dataset, data_loader.load_indicators(dataset))
+        for country, rows in df.groupby("Country Code", sort=True):
+            if countries and country not in countries:
+                continue
+            by_country.setdefault(country, {})[dataset] = rows.reset_index(drop=True)
+    return by_country
+
+
+def run(datasets, out_dir, formats, workers=None, countries=None):
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    by_country = country_frames(datasets, countries)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(export_country, country, frames, out_dir, formats)
+                   for country, frames in by_country.items()]
+        for future in futures:
+            results.append(future.result())
+    return results, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export cleaned per-country workbooks and CSVs.")
+    parser.add_argument("--out", default="exports", help="output directory (default: exports)")
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=DATASETS)
+    parser.add_argument("--formats", nargs="+", choices=["xlsx", "csv"], default=["xlsx", "csv"])
+    parser.add_argument("--countries", nargs="+", help="country codes to export (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    results, seconds = run(args.datasets, args.out, args.formats, args.workers, args.countries)
+    for country, rows, written, task_seconds in results:
+        print(f"{country}: {rows} rows, {written / 1024:.1f} KB in {task_seconds * 1000:.0f} ms")
+    rows = sum(r[1] for r in results)
+    written = sum(r[2] for r in results)
+    print(f"{len(results)} countries, {rows} rows, {written / 1024 / 1024:.2f} MB in {seconds:.2f}s "
+          f"({len(results) / seconds:.1f} countries/s, {rows / seconds:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
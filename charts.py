@@ -0,0 +1,129 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import artifact_cache
+
+# --- Payload-aware figure builders ---
+# Small frames are plotted exactly as before. Once a figure would ship more
+# than POINT_BUDGET points to the browser, the data is reduced on the server
+# first: lines are decimated with LTTB, scatters become a binned density
+# heatmap, histograms are pre-binned and box plots are drawn from precomputed
+# quartiles.
+POINT_BUDGET = int(os.environ.get("URBAN_PLOT_POINT_BUDGET", 5000))
+DENSITY_BINS = int(os.environ.get("URBAN_PLOT_DENSITY_BINS", 60))
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of the points that best preserve
+    # the visual shape of the series
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        nxt_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:nxt_stop].mean() if nxt_stop > stop else x[-1]
+        avg_y = y[stop:nxt_stop].mean() if nxt_stop > stop else y[-1]
+        area = np.abs((x[prev] - avg_x) * (y[start:stop] - y[prev])
+                      - (x[prev] - x[start:stop]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def line_chart(df, x, y, budget=None, **kwargs):
+    budget = budget or POINT_BUDGET
+    columns = [y] if isinstance(y, str) else list(y)
+    if len(df) * len(columns) <= budget:
+        return px.line(df, x=x, y=y, **kwargs)
+    per_series = max(budget // len(columns), 3)
+    frames = []
+    for col in columns:
+        series = df[[x, col]].dropna()
+        keep = lttb(series[x].to_numpy(), series[col].to_numpy(), per_series)
+        frames.append(pd.DataFrame({x: series[x].to_numpy()[keep],
+                                    "value": series[col].to_numpy()[keep],
+                                    "variable": col}))
+    kwargs.pop("markers", None)
+    fig = px.line(pd.concat(frames), x=x, y="value", color="variable", **kwargs)
+    fig.update_layout(yaxis_title="value")
+    return fig
+
+
+def scatter_chart(df, x, y, budget=None, title=None, **kwargs):
+    budget = budget or POINT_BUDGET
+    if kwargs.get("size") is not None:
+        # Marker sizes cannot be missing; gap filling leaves series edges empty
+        df = df.dropna(subset=[kwargs["size"]])
+    if len(df) <= budget:
+        return px.scatter(df, x=x, y=y, title=title, **kwargs)
+    data = df[[x, y]].dropna()
+    counts, x_edges, y_edges = np.histogram2d(data[x], data[y], bins=DENSITY_BINS)
+    counts[counts == 0] = np.nan
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=counts.T,
+        colorscale="Viridis",
+        colorbar={"title": "count"},
+    ))
+    fig.update_layout(title=f"{title} (density of {len(data):,} points)" if title else None,
+                      xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def histogram_chart(df, x, nbins=15, budget=None, color_discrete_sequence=None, **kwargs):
+    budget = budget or POINT_BUDGET
+    if len(df) <= budget:
+        return px.histogram(df, x=x, nbins=nbins, color_discrete_sequence=color_discrete_sequence, **kwargs)
+    counts, edges = np.histogram(df[x].dropna(), bins=nbins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        marker_color=(color_discrete_sequence or [None])[0],
+    ))
+    fig.update_layout(xaxis_title=x, yaxis_title="count", bargap=0, **kwargs)
+    return fig
+
+
+def box_chart(df, y, points="all", budget=None, color_discrete_sequence=None, **kwargs):
+    budget = budget or POINT_BUDGET
+    if len(df) <= budget:
+        return px.box(df, y=y, points=points, color_discrete_sequence=color_discrete_sequence, **kwargs)
+    values = df[y].dropna().to_numpy()
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    fig = go.Figure(go.Box(
+        q1=[q1], median=[median], q3=[q3],
+        lowerfence=[inside.min()], upperfence=[inside.max()],
+        mean=[values.mean()], name=y,
+        marker_color=(color_discrete_sequence or [None])[0],
+    ))
+    fig.update_layout(yaxis_title=y, **kwargs)
+    return fig
+
+
+# --- Memoized figures ---
+BUILDERS = {
+    "line": line_chart,
+    "scatter": scatter_chart,
+    "histogram": histogram_chart,
+    "box": box_chart,
+}
+
+
+def cached_chart(kind, fingerprint, filters, df, **spec):
+    # df must be the frame described by (fingerprint, filters); it is only
+    # read when the figure is not already cached
+    key = (fingerprint, filters, kind, POINT_BUDGET, repr(sorted(spec.items())))
+    return artifact_cache.get_or_build(key, lambda: BUILDERS[kind](df, **spec))
@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import gapfill
+import indicators
+
+# Gap filling defaults: method, points a series' last value is carried
+# forward, and the longest interior gap that is interpolated
+GAP_METHOD = os.environ.get("URBAN_GAP_METHOD", "linear")
+GAP_LIMIT = int(os.environ.get("URBAN_GAP_LIMIT", 3))
+GAP_MAX = int(os.environ.get("URBAN_GAP_MAX", 5))
+
+
+# --- Cleaning stages ---
+# Each stage factory returns a callable that takes the frame, cleans it on the
+# whole frame at once (no per-column Python loops) and returns it. Stages
+# modify the frame in place where pandas allows it; run_pipeline makes the
+# single defensive copy up front.
+def dedupe(subset=None):
+    def stage(df):
+        return df.drop_duplicates(subset=subset)
+    return stage
+
+
+def sentinel_to_nan(sentinels=None):
+    sentinels = indicators.MISSING_SENTINELS if sentinels is None else sentinels
+
+    def stage(df):
+        text_cols = df.select_dtypes(exclude="number").columns
+        if len(text_cols):
+            df[text_cols] = df[text_cols].replace(sentinels, np.nan)
+        return df
+    return stage
+
+
+def coerce(columns, dtype="float64"):
+    def stage(df):
+        cols = [c for c in columns if c in df.columns]
+        pending = [c for c in cols if df[c].dtype != dtype]
+        if pending:
+            df[pending] = df[pending].apply(pd.to_numeric, errors="coerce")
+        df[cols] = df[cols].astype(dtype)
+        return df
+    return stage
+
+
+def drop_missing(columns, how="any"):
+    def stage(df):
+        cols = [c for c in columns if c in df.columns]
+        return df.dropna(subset=cols, how=how) if cols else df
+    return stage
+
+
+def fill_gaps(columns, method=None, limit=None, max_gap=None, by="Country Code", order="Time", mark=True):
+    # Per-country interpolation over years (see gapfill); with mark, a
+    # "<column> (imputed)" flag column is added next to each filled column
+    method = method or GAP_METHOD
+    limit = GAP_LIMIT if limit is None else limit
+    max_gap = GAP_MAX if max_gap is None else max_gap
+
+    def stage(df):
+        cols = [c for c in columns if c in df.columns]
+        if not cols or by not in df.columns or order not in df.columns:
+            return df
+        filled, imputed = gapfill.fill_wide(df, cols, by, order, method, limit, max_gap)
+        df[cols] = filled[cols]
+        if mark:
+            for col in cols:
+                df[col + gapfill.IMPUTED_SUFFIX] = imputed[col]
+        return df
+    return stage
+
+
+def validate_range(columns, ranges=None):
+    # Values outside an indicator's valid range (e.g. negative unemployment)
+    # are treated as missing
+    def stage(df):
+        bounds = ranges or indicators.valid_ranges(columns)
+        cols = [c for c in bounds if c in df.columns]
+        if not cols:
+            return df
+        low = np.array([bounds[c][0] for c in cols], dtype=float)
+        high = np.array([bounds[c][1] for c in cols], dtype=float)
+        values = df[cols].to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            invalid = (values < low) | (values > high)
+        if invalid.any():
+            df[cols] = df[cols].mask(invalid)
+        return df
+    return stage
+
+
+# --- Pipelines ---
+def primary_pipeline(columns=None):
+    columns = columns or indicators.names("primary")
+    return [
+        ("Remove duplicates", dedupe()),
+        ("Sentinel '..' to NaN", sentinel_to_nan()),
+        ("Coerce to numeric", coerce(columns)),
+        ("Validate ranges", validate_range(columns)),
+        ("Drop incomplete rows", drop_missing(columns)),
+    ]
+
+
+def secondary_pipeline(columns=None, method=None):
+    columns = columns or indicators.names("secondary")
+    return [
+        ("Sentinel '..' to NaN", sentinel_to_nan()),
+        ("Coerce to numeric", coerce(columns)),
+        ("Validate ranges", validate_range(columns)),
+        (f"Fill gaps ({method or GAP_METHOD})", fill_gaps(columns, method)),
+    ]
+
+
+# The Python / Excel page and the batch export clean in two halves: parse
+# and coerce, then drop rows missing every required indicator and fill each
+# country's gaps from its neighbouring years.
+EXPORT_REQUIRED = {
+    "primary": ["Unemployment Rate", "Internet Users"],
+    "secondary": None,
+}
+
+
+def export_prepare(columns, year="Year"):
+    return [
+        ("Remove duplicates", dedupe()),
+        ("Sentinels to NaN", sentinel_to_nan(["..", ""])),
+        ("Coerce year", coerce([year], dtype="Int64")),
+        ("Coerce to numeric", coerce(columns)),
+    ]
+
+
+def export_fill(columns, required=None, year="Year"):
+    return [
+        ("Drop empty rows", drop_missing(columns if required is None else required, how="all")),
+        (f"Fill gaps ({GAP_METHOD})", fill_gaps(columns, order=year)),
+    ]
+
+
+def export_pipeline(dataset, columns=None):
+    columns = columns or indicators.names(dataset)
+    required = EXPORT_REQUIRED[dataset]
+    if required is not None:
+        required = [c for c in required if c in columns]
+    return export_prepare(columns) + export_fill(columns, required)
+
+
+# tracemalloc is process-wide: profiled runs are serialized so one run's
+# reset_peak/stop never lands inside another's measurements
+_profile_lock = threading.Lock()
+
+
+def run_pipeline(df, steps, profile=False, copy=True):
+    # Returns the cleaned frame and, when profiling, a per-stage breakdown of
+    # wall time, peak traced memory and surviving rows
+    if profile:
+        with _profile_lock:
+            return _run_pipeline(df, steps, profile, copy)
+    return _run_pipeline(df, steps, profile, copy)
+
+
+def _run_pipeline(df, steps, profile, copy):
+    if copy:
+        df = df.copy()
+    report = []
+    tracing = profile and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        for name, stage in steps:
+            if profile:
+                tracemalloc.reset_peak()
+                start_mem = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+            df = stage(df)
+            if profile:
+                elapsed = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1] - start_mem
+                report.append({"Stage": name, "Time (ms)": elapsed * 1000,
+                               "Peak memory (KB)": max(peak, 0) / 1024, "Rows": len(df)})
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    return df, pd.DataFrame(report, columns=["Stage", "Time (ms)", "Peak memory (KB)", "Rows"])
@@ -0,0 +1,196 @@
+import hashlib
+import os
+import sys
+import threading
+import pandas as pd
+import cleaning
+import datamodel
+import frame_cache
+import gapfill
+import indicators
+import rollup
+
+# --- Source files ---
+PRIMARY_CSV = "datasets.csv"
+SECONDARY_CSV = "dataset2.csv"
+
+# Parsed frames live here for the life of the process, keyed by
+# (kind, absolute path, size, mtime) so an edited CSV is picked up on the
+# next rerun while an unchanged one is never parsed twice.
+_frames = {}
+_lock = threading.Lock()
+
+
+def source_key(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _cached(kind, path, build):
+    key = (kind,) + source_key(path)
+    with _lock:
+        if key in _frames:
+            return _frames[key]
+    df = build(path)
+    with _lock:
+        # Drop frames built from an older version of the same file
+        for stale in [k for k in _frames if k[:2] == key[:2]]:
+            del _frames[stale]
+        _frames[key] = df
+    return df
+
+
+def clear_cache():
+    with _lock:
+        _frames.clear()
+
+
+# --- Parsing ---
+# Only the id columns and the registered indicators are parsed, directly into
+# their registry dtype with ".." read as missing, so indicator columns are
+# never materialized as object strings and coerced afterwards.
+def _parse(path, options, columns, chunksize, on_chunk, coerce):
+    usecols = options["usecols"]
+
+    def prepare(df):
+        df = df[usecols].rename(columns=columns)
+        if coerce:
+            values = list(columns.values())
+            df[values] = df[values].apply(pd.to_numeric, errors='coerce')
+        return df
+
+    if not chunksize:
+        return prepare(pd.read_csv(path, **options))
+
+    # Streaming mode: peak memory is one raw chunk plus the reduced output
+    parts = []
+    with pd.read_csv(path, chunksize=chunksize, **options) as reader:
+        for chunk in reader:
+            chunk = prepare(chunk)
+            parts.append(on_chunk(chunk) if on_chunk else chunk)
+    if not parts:
+        return prepare(pd.read_csv(path, nrows=0, **options))
+    return pd.concat(parts)
+
+
+def read_indicators(path, dataset, names=None, chunksize=None, on_chunk=None):
+    options = indicators.parser_options(dataset, names)
+    columns = indicators.rename_map(dataset, names=names)
+    try:
+        return _parse(path, options, columns, chunksize, on_chunk, coerce=False)
+    except ValueError:
+        # A stray non-numeric token: parse untyped and coerce instead
+        untyped = dict(options, dtype=None)
+        return _parse(path, untyped, columns, chunksize, on_chunk, coerce=True)
+
+
+# --- Cleaning (shared by every page) ---
+# Cached frames and fingerprints are keyed on a digest of everything that
+# shapes the cleaned output: the indicator registry and the parsing and
+# cleaning code, plus the URBAN_GAP_* settings the gap-filling stage runs
+# with. Adding an indicator, changing a stage or switching the gap method
+# invalidates frames built by the older pipeline without a manual version bump.
+def pipeline_version():
+    digest = hashlib.sha256(repr(indicators.INDICATORS).encode())
+    digest.update(repr((cleaning.GAP_METHOD, cleaning.GAP_LIMIT, cleaning.GAP_MAX)).encode())
+    for module in (sys.modules[__name__], cleaning, gapfill):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+CLEANING_VERSION = pipeline_version()
+
+
+def clean_primary(df):
+    return cleaning.run_pipeline(df, cleaning.primary_pipeline(), copy=False)[0]
+
+
+def clean_secondary(df):
+    return cleaning.run_pipeline(df, cleaning.secondary_pipeline(), copy=False)[0]
+
+
+# --- Streaming ingestion (exports larger than RAM) ---
+# Files above the threshold are read in chunks and projected to the id
+# columns plus the requested indicators; row filters run per chunk, so only
+# the cleaned output is ever held whole.
+CHUNK_ROWS = int(os.environ.get("URBAN_CHUNK_ROWS", 100_000))
+STREAM_THRESHOLD_BYTES = int(os.environ.get("URBAN_STREAM_THRESHOLD_MB", 256)) * 1024 * 1024
+
+
+def stream_primary(path=PRIMARY_CSV, names=None, chunksize=None):
+    # Same row filter as the in-memory pipeline: only the indicators are required
+    required = [ind.name for ind in indicators.for_dataset("primary", names)]
+    df = read_indicators(path, "primary", names, chunksize or CHUNK_ROWS,
+                         on_chunk=lambda chunk: chunk.dropna(subset=required))
+    return clean_primary(df)
+
+
+def stream_secondary(path=SECONDARY_CSV, names=None, chunksize=None):
+    # Gap filling needs whole series, so it runs once on the projected output
+    return clean_secondary(read_indicators(path, "secondary", names, chunksize or CHUNK_ROWS))
+
+
+def should_stream(path):
+    return os.path.getsize(path) >= STREAM_THRESHOLD_BYTES
+
+
+# --- Public loaders ---
+# Returned frames are shared between pages and reruns: treat them as
+# read-only and derive new frames (rename/copy) before mutating.
+def load_raw(path):
+    # The untyped file, for "original data" displays only
+    return _cached("raw", path, pd.read_csv)
+
+
+def load_indicators(dataset):
+    # Id columns plus the registered indicators, parsed into their registry
+    # dtypes with ".." as missing but otherwise uncleaned
+    path = {"primary": PRIMARY_CSV, "secondary": SECONDARY_CSV}[dataset]
+    return _cached(f"typed_{dataset}", path, lambda p: read_indicators(
+        p, dataset, chunksize=CHUNK_ROWS if should_stream(p) else None))
+
+
+def _load_clean(kind, path, clean, stream):
+    # In-process cache first, then the on-disk Arrow cache, then the CSV
+    # (streamed in chunks when it is too large to parse in one go)
+    def build(p):
+        if should_stream(p):
+            return stream(p)
+        return clean(read_indicators(p, kind))
+    return _cached(kind, path, lambda p: frame_cache.load_or_build(
+        kind, p, CLEANING_VERSION, lambda: build(p)))
+
+
+def load_primary(path=PRIMARY_CSV):
+    return _load_clean("primary", path, clean_primary, stream_primary)
+
+
+def load_secondary(path=SECONDARY_CSV):
+    return _load_clean("secondary", path, clean_secondary, stream_secondary)
+
+
+def fingerprint(dataset):
+    # Identifies one version of a cleaned dataset (source file + pipeline)
+    path = {"primary": PRIMARY_CSV, "secondary": SECONDARY_CSV}[dataset]
+    return source_key(path) + (CLEANING_VERSION,)
+
+
+def load_long(dataset):
+    # (country, indicator, year)-indexed long frame built from the cleaned one
+    path, load = {"primary": (PRIMARY_CSV, load_primary),
+                  "secondary": (SECONDARY_CSV, load_secondary)}[dataset]
+    return _cached(f"long_{dataset}", path, lambda p: datamodel.to_long(load(p), dataset))
+
+
+def load_cube(dataset):
+    # Rollup cube over the long store, built once per dataset version
+    path = {"primary": PRIMARY_CSV, "secondary": SECONDARY_CSV}[dataset]
+    return _cached(f"cube_{dataset}", path, lambda p: rollup.build(load_long(dataset)))
+
+
+def load_year_index(dataset):
+    path, load = {"primary": (PRIMARY_CSV, load_primary),
+                  "secondary": (SECONDARY_CSV, load_secondary)}[dataset]
+    return _cached(f"years_{dataset}", path, lambda p: datamodel.YearIndex(load(p)))
+
@@ -0,0 +1,152 @@
+import streamlit as st
+import cleaning
+import data_loader
+import db
+import db_loader
+import dedupe
+import indicators
+import queries
+import schema
+
+# Load reports per (table, source file version): each CSV version is synced
+# into the database once per process
+_loads = {}
+
+# Both tables are keyed by (country_code, year)
+DB_ID_NAMES = {"Country Code": "country_code"}
+DB_KEY = ["country_code", "year"]
+
+
+def _db_columns(dataset):
+    # Registry names -> database column names
+    return {ind.name: ind.db_column for ind in indicators.for_dataset(dataset)}
+
+
+def _sync_table(engine, table, df, key_columns, source_version):
+    if (table, source_version) not in _loads:
+        _loads[(table, source_version)] = db_loader.upsert_frame(engine, table, df, key_columns)
+    report = _loads[(table, source_version)]
+    st.caption(
+        f"{table}: {report.inserted} inserted, {report.updated} updated, "
+        f"{report.unchanged} unchanged ({report.rows_per_sec:,.0f} rows/sec)"
+    )
+
+
+def _paged_table(engine, table):
+    # Only the visible page (plus a prefetch window) is read from the
+    # database; the table version is probed once per render
+    version = queries.table_version(engine, table)
+    pages = queries.page_count(engine, table, version=version)
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"{table}_page")
+    df = queries.fetch_page(engine, table, int(page) - 1, version=version)
+    st.dataframe(df)
+    return df
+
+
+def _show_canned(engine, table):
+    # Slots keep the page layout in query order while results fill in as
+    # each concurrent query finishes
+    slots = [st.container() for _ in queries.CANNED[table]]
+    finished = []
+    for done in queries.run_canned(engine, table):
+        with slots[done.position]:
+            st.markdown(f"**{done.title}**")
+            st.dataframe(done.result)
+            st.caption(f"{done.seconds * 1000:.1f} ms" + (" (cached)" if done.cached else ""))
+        finished.append(done)
+    slowest = max(finished, key=lambda d: d.seconds)
+    st.caption(f"Slowest query: {slowest.title} {slowest.seconds * 1000:.1f} ms")
+
+
+def show_database_integration():
+    st.title("Database Integration (Q4)")
+
+    # --- Step 1: Connect (pooled engine; database and tables are bootstrapped once per process) ---
+    engine = db.get_engine()
+
+    # --- Step 2: Sync new/changed CSV rows into the DB (First Dataset) ---
+    csv_df = data_loader.load_indicators("primary").rename(columns={"Time": "year", **DB_ID_NAMES, **_db_columns("primary")})
+    csv_df = csv_df[DB_KEY + schema.TRENDS_COLUMNS].dropna()
+    csv_df = csv_df.astype({"country_code": str, "year": int})
+
+    _sync_table(engine, "SA_TrendsData", csv_df, DB_KEY, data_loader.fingerprint("primary"))
+
+    # --- Step 3: Query Data from Database (paged) ---
+    st.subheader("Data Loaded from MySQL Database")
+    page_df = _paged_table(engine, "SA_TrendsData")
+
+    # --- Step 4: Demonstrate Update & Delete (Your Operations Stay) ---
+    st.subheader("Database Operations")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        round_clicked = st.button("Round Values to Whole Numbers")
+    with col2:
+        delete_clicked = st.button("Delete Duplicate Rows")
+    with col3:
+        query_clicked = st.button("Run SQl Queries")
+
+    if round_clicked:
+        numeric = page_df.select_dtypes("number").columns
+        refreshed_df = page_df.assign(**{c: page_df[c].round(0).astype(int) for c in numeric})
+        st.subheader("Rounded Dataset ")
+        st.dataframe(refreshed_df)
+
+    if delete_clicked:
+        # Duplicates after rounding to whole numbers, found and renumbered in the database
+        steps = {c: 1 for c in schema.TRENDS_COLUMNS}
+        cleaned_df, removed_df = dedupe.dedupe_table(engine, "SA_TrendsData", steps, schema.TRENDS_COLUMNS)
+        cleaned_df = cleaned_df.astype({c: "Int64" for c in schema.TRENDS_COLUMNS})
+        duplicates = removed_df["year"].tolist()
+        st.warning(f"⚠️ Removed duplicate rows  {duplicates}")
+        st.subheader("Database View After Removing Duplicates (Display Only)")
+        st.dataframe(cleaned_df)
+
+    if query_clicked:
+        st.subheader("SQL Queries ")
+        _show_canned(engine, "SA_TrendsData")
+    
+        # --- Step 5: Load & Show Second Dataset ---
+    st.subheader("Second Dataset")
+
+    df2 = data_loader.load_indicators("secondary")
+    df2_clean = df2.rename(columns={**_db_columns("secondary"), **indicators.PAGE_ID_NAMES})
+    df2_clean = df2_clean.dropna(subset=["Country Code", "Year"])
+
+    # Fill gaps per country like every other page
+    df2_clean, _ = cleaning.run_pipeline(df2_clean, [
+        ("Fill gaps", cleaning.fill_gaps(schema.SOCIAL_COLUMNS, order="Year", mark=False)),
+    ])
+
+    st.dataframe(df2_clean)
+
+    # Sync new/changed rows into the DB
+    social_df = df2_clean.rename(columns={"Year": "year", **DB_ID_NAMES})
+    _sync_table(engine, "SA_SocialData", social_df[DB_KEY + schema.SOCIAL_COLUMNS],
+                DB_KEY, data_loader.fingerprint("secondary"))
+
+    # --- Run Queries only when button clicked ---
+    if st.button("Run SQL Queries on Second Dataset"):
+        st.subheader("SQL Queries on Second Dataset")
+        _show_canned(engine, "SA_SocialData")
+
+    st.subheader("Insights from First Dataset")
+    st.markdown("""
+- The average urban population from 1960 to 2021 is approximately **62.40%**, indicating a significant urbanization trend in South Africa.
+- The average unemployment rate over the same period is around **26.36%**, highlighting ongoing economic challenges.
+- Internet usage has seen a substantial increase, with an average of **33.44%**, reflecting growing digital connectivity.
+- The year with the highest unemployment rate was **2021**, reaching **34.00%**, likely influenced by the economic impacts of the COVID-19 pandemic.
+- There has been a remarkable growth in internet usage, increasing by **72.09%** from **2.91% in 1990** to **75.00% in 2021**.
+- Notably, the unemployment rate exceeded **30%** in several years, particularly from **2019 to 2021**, indicating persistent labor market issues.
+- Grouping the data by decade reveals that the **2010s** experienced the highest average urban population (**64.56%**) and internet usage (**48.87%**), while the unemployment rate peaked in the **2020s** at **32.15%**.
+""")
+
+    st.subheader("Insights from Second Dataset")
+    st.markdown("""
+- The average secondary enrollment rate from 1975 to 2024 is approximately **64.80%**, indicating a strong emphasis on education in South Africa.
+- The average Gini index over the same period is around **61.80%**, highlighting significant income inequality in the country.
+- The average trends grouped by decade show that the **2010s** had the highest average secondary enrollment (**68.12%**), while the **1990s** experienced a slight decline to **62.00%**. The Gini index remained relatively stable across decades.
+- The Gini index exceeded **60** in several years, particularly from **1995 to 2024**, indicating persistent income inequality.
+- The years when female labor force participation exceeded **50%** were **2018, 2019, 2020, 2021, 2022, 2023, and 2024**, reflecting increasing participation.
+""")
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import gapfill
+import indicators
+
+# --- Long-format indicator store ---
+# Every dataset is reshaped to one row per (country, indicator, year) with a
+# value column and an "imputed" flag for gap-filled values. Country and
+# indicator are categoricals (small integer codes) and the frame is indexed and
+# sorted by (country, indicator, year), so a country, a single series or a
+# year range within a series is an index seek instead of a scan, and "latest
+# value per country" is read off the series boundaries.
+INDEX = ["country", "indicator", "year"]
+
+
+def to_long(wide, dataset, country_col="Country Code"):
+    registered = [ind for ind in indicators.for_dataset(dataset) if ind.name in wide.columns]
+    long = wide.melt(
+        id_vars=[country_col, "Time"],
+        value_vars=[ind.name for ind in registered],
+        var_name="indicator",
+        value_name="value",
+    )
+    # Gap-filled values keep their flag (see cleaning.fill_gaps)
+    flags = [ind.name + gapfill.IMPUTED_SUFFIX for ind in registered]
+    if registered and all(f in wide.columns for f in flags):
+        long["imputed"] = wide[flags].to_numpy(dtype=bool).T.ravel()
+    else:
+        long["imputed"] = False
+    long = long.dropna(subset=[country_col, "Time"])
+    long = long.rename(columns={country_col: "country", "Time": "year"})
+    long["country"] = long["country"].astype("category")
+    long["indicator"] = pd.Categorical(
+        long["indicator"].map({ind.name: ind.code for ind in registered}),
+        categories=[ind.code for ind in registered],
+    )
+    long["year"] = long["year"].astype("int16")
+    long["value"] = long["value"].astype("float64")
+    return long.set_index(INDEX).sort_index()
+
+
+def countries(long):
+    return list(long.index.get_level_values("country").unique())
+
+
+def series(long, country, indicator, years=None):
+    # One indicator for one country, indexed by year
+    values = long.loc[(country, indicators.lookup(indicator)), "value"]
+    if years is not None:
+        values = values.loc[years[0]:years[1]]
+    return values
+
+
+def latest(long, indicator=None):
+    # Last observed (non-missing) value per (country, indicator), computed from
+    # the sorted index codes in one vectorized pass
+    observed = long[long["value"].notna()]
+    if indicator is not None:
+        observed = observed.xs(indicators.lookup(indicator), level="indicator", drop_level=False)
+    if observed.empty:
+        return observed.reset_index()
+    country_codes = observed.index.codes[0]
+    indicator_codes = observed.index.codes[1]
+    last = np.ones(len(observed), dtype=bool)
+    last[:-1] = (country_codes[1:] != country_codes[:-1]) | (indicator_codes[1:] != indicator_codes[:-1])
+    return observed[last].reset_index()
+
+
+def latest_value(long, country, indicator):
+    values = series(long, country, indicator).dropna()
+    return values.iloc[-1] if len(values) else np.nan
+
+
+# --- Year-range index for wide frames ---
+# The frame is kept sorted by year and the first row offset of every year is
+# precomputed, so a [low, high] year filter is a positional slice (a view, no
+# boolean masks or copies) and slider bounds are read straight off the index.
+class YearIndex:
+    def __init__(self, df, column="Time"):
+        df = df[df[column].notna()]
+        if not df[column].is_monotonic_increasing:
+            df = df.sort_values(column, kind="stable")
+        self.frame = df
+        years = df[column].to_numpy()
+        self.years, self.offsets = np.unique(years, return_index=True)
+        self.offsets = np.append(self.offsets, len(years))
+
+    @property
+    def min_year(self):
+        return int(self.years[0])
+
+    @property
+    def max_year(self):
+        return int(self.years[-1])
+
+    def bounds(self, low, high):
+        start = self.offsets[np.searchsorted(self.years, low, side="left")]
+        stop = self.offsets[np.searchsorted(self.years, high, side="right")]
+        return start, stop
+
+    def slice(self, low, high):
+        start, stop = self.bounds(low, high)
+        return self.frame.iloc[start:stop]
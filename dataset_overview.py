@@ -0,0 +1,11 @@
+import streamlit as st
+import data_loader
+
+def show_dataset_overview():
+    st.title("Urban Data Insights")
+    st.markdown('<h3 style="color:#4F8BF9;">Explore Urban Population, Unemployment & Internet Usage Trends</h3>', unsafe_allow_html=True)
+    st.subheader("Primary Dataset")
+    st.dataframe(data_loader.load_raw(data_loader.PRIMARY_CSV))
+    st.subheader("Secondary Dataset")
+    st.dataframe(data_loader.load_raw(data_loader.SECONDARY_CSV))
+    st.markdown("View the original data before cleaning and analysis.")
@@ -0,0 +1,93 @@
+import os
+import time
+from datetime import datetime, timezone
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import MetaData, Table
+import schema
+
+# --- Incremental bulk loader ---
+# The source frame is diffed against the table by primary key and only new or
+# changed rows are written, in multi-row INSERT ... ON DUPLICATE KEY UPDATE
+# (MySQL) / INSERT ... ON CONFLICT DO UPDATE (SQLite, PostgreSQL) batches.
+# Re-running a load with unchanged data writes nothing.
+BATCH_ROWS = int(os.environ.get("URBAN_DB_BATCH_ROWS", 10000))
+# Values are compared at the precision the DECIMAL(6,3) columns store
+COMPARE_DECIMALS = 3
+
+UPSERT_BACKENDS = ("mysql", "sqlite", "postgresql")
+
+LoadReport = namedtuple("LoadReport", ["table", "inserted", "updated", "unchanged", "seconds", "rows_per_sec"])
+
+
+def _upsert_statement(table, engine, columns, key_columns):
+    # Compiled once and executed per batch; SQLAlchemy's "insertmanyvalues"
+    # turns each batch into multi-row VALUES statements
+    backend = engine.dialect.name
+    value_columns = [c for c in columns if c not in key_columns]
+    if backend == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in value_columns})
+    if backend in ("sqlite", "postgresql"):
+        if backend == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        return stmt.on_conflict_do_update(index_elements=key_columns,
+                                          set_={c: stmt.excluded[c] for c in value_columns})
+    raise ValueError(f"Bulk upsert is not supported for the {backend} dialect "
+                     f"(supported: {', '.join(UPSERT_BACKENDS)})")
+
+
+def diff_against_table(engine, table_name, df, key_columns):
+    # Split the source rows into new, changed and unchanged by primary key
+    value_columns = [c for c in df.columns if c not in key_columns]
+    quoted = ", ".join(engine.dialect.identifier_preparer.quote(c) for c in df.columns)
+    existing = pd.read_sql(f"SELECT {quoted} FROM {table_name}", engine)
+    if existing.empty:
+        return df, df.iloc[0:0], 0
+
+    existing[value_columns] = existing[value_columns].apply(pd.to_numeric, errors="coerce")
+    merged = df.merge(existing, on=key_columns, how="left", suffixes=("", "__db"), indicator=True)
+    is_new = (merged["_merge"] == "left_only").to_numpy()
+
+    source = merged[value_columns].to_numpy(dtype=float).round(COMPARE_DECIMALS)
+    stored = merged[[f"{c}__db" for c in value_columns]].to_numpy(dtype=float).round(COMPARE_DECIMALS)
+    same = (source == stored) | (np.isnan(source) & np.isnan(stored))
+    is_changed = ~is_new & ~same.all(axis=1)
+
+    new_rows = df[is_new]
+    changed_rows = df[is_changed]
+    return new_rows, changed_rows, int((~is_new & ~is_changed).sum())
+
+
+def upsert_frame(engine, table_name, df, key_columns, batch_rows=None):
+    batch_rows = batch_rows or BATCH_ROWS
+    start = time.perf_counter()
+    df = df.drop_duplicates(subset=key_columns, keep="last")
+    new_rows, changed_rows, unchanged = diff_against_table(engine, table_name, df, key_columns)
+    pending = pd.concat([new_rows, changed_rows])
+
+    if len(pending):
+        table = Table(table_name, MetaData(), autoload_with=engine)
+        if "updated_at" in table.c:
+            # Bumps the table version the query cache keys on
+            pending = pending.assign(updated_at=datetime.now(timezone.utc).replace(tzinfo=None))
+        # Plain Python scalars (None for missing) for the driver
+        pending = pending.astype(object).where(pending.notna(), None)
+        records = pending.to_dict("records")
+        stmt = _upsert_statement(table, engine, list(pending.columns), key_columns)
+        with engine.begin() as conn:
+            for i in range(0, len(records), batch_rows):
+                conn.execute(stmt, records[i:i + batch_rows])
+            if table_name in schema.ROLLUPS and "year" in pending.columns:
+                # Keep the decade rollup in step, touching only affected decades
+                schema.refresh_rollup(conn, table_name, {int(y) // 10 * 10 for y in pending["year"]})
+
+    seconds = time.perf_counter() - start
+    written = len(pending)
+    return LoadReport(table_name, len(new_rows), len(changed_rows), unchanged,
+                      seconds, written / seconds if seconds > 0 else 0.0)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+# --- Duplicate detection and renumbering ---
+# Rows are duplicates when they share the partition columns (country) and
+# every matched value column agrees after snapping to that column's step
+# (step 1 = whole numbers, 0.5 = halves, ...). The first row in year order is
+# kept, and the kept rows of each partition are renumbered to consecutive
+# years from the partition's first year. dedupe_frame does this in one
+# vectorized pass over a frame; dedupe_sql/dedupe_table push the same logic
+# into the database with window functions (MySQL 8+, SQLite 3.25+).
+PARTITION = ["country_code"]
+ORDER = "year"
+
+
+def _snap(values, step):
+    # Nearest multiple of step, halves away from zero like SQL ROUND
+    scaled = np.asarray(values, dtype=float) / step
+    return np.sign(scaled) * np.floor(np.abs(scaled) + 0.5) * step
+
+
+def dedupe_frame(df, steps, partition=None, order=ORDER):
+    # (kept rows renumbered, removed rows); steps maps column -> step
+    partition = PARTITION if partition is None else list(partition)
+    df = df.sort_values(partition + [order], kind="stable")
+    snapped = df.assign(**{c: _snap(df[c], step) for c, step in steps.items()})
+    removed_mask = snapped.duplicated(subset=partition + list(steps), keep="first").to_numpy()
+
+    kept = snapped[~removed_mask]
+    if partition:
+        groups = kept.groupby(partition, sort=False, dropna=False)[order]
+        first = groups.transform("min").to_numpy()
+        position = groups.cumcount().to_numpy()
+    else:
+        first = kept[order].min()
+        position = np.arange(len(kept))
+    kept = kept.assign(**{order: (first + position).astype(kept[order].dtype)})
+    return kept.reset_index(drop=True), df[removed_mask].reset_index(drop=True)
+
+
+def dedupe_sql(table, steps, columns, partition=None, order=ORDER):
+    # (kept rows renumbered, removed rows) queries for a table
+    partition = PARTITION if partition is None else list(partition)
+    snapped = {c: f"ROUND({c} / {step!r}) * {step!r}" for c, step in steps.items()}
+    ranked = f"""
+        WITH ranked AS (
+            SELECT {", ".join(partition + [order] + columns)},
+                   ROW_NUMBER() OVER (
+                       PARTITION BY {", ".join(partition + list(snapped.values()))}
+                       ORDER BY {order}
+                   ) AS dup_rank
+            FROM {table}
+        )"""
+    over = f"PARTITION BY {', '.join(partition)} " if partition else ""
+    values = [f"{snapped[c]} AS {c}" if c in snapped else c for c in columns]
+    kept = f"""{ranked}
+        SELECT {", ".join(partition)}{", " if partition else ""}
+               MIN({order}) OVER ({over.strip()}) + ROW_NUMBER() OVER ({over}ORDER BY {order}) - 1 AS {order},
+               {", ".join(values)}
+        FROM ranked
+        WHERE dup_rank = 1
+        ORDER BY {", ".join(partition + [order])}
+    """
+    removed = f"""{ranked}
+        SELECT {", ".join(partition + [order] + columns)}
+        FROM ranked
+        WHERE dup_rank > 1
+        ORDER BY {", ".join(partition + [order])}
+    """
+    return kept, removed
+
+
+def dedupe_table(engine, table, steps, columns, partition=None, order=ORDER):
+    # dedupe_sql run on the server; only the results cross the wire
+    kept_sql, removed_sql = dedupe_sql(table, steps, columns, partition, order)
+    frames = []
+    for sql in (kept_sql, removed_sql):
+        df = pd.read_sql(sql, engine)
+        df[columns] = df[columns].apply(pd.to_numeric, errors="coerce")
+        frames.append(df)
+    return tuple(frames)
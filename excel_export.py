@@ -0,0 +1,140 @@
+import io
+import os
+import threading
+from collections import OrderedDict, namedtuple
+import pandas as pd
+import xlsxwriter
+import indicators
+
+# --- Excel export ---
+# Workbooks are written row by row in xlsxwriter's constant_memory mode (each
+# row is flushed to disk as soon as the next one starts) into an in-memory
+# buffer, so nothing lands in the working directory. Bytes are cached by
+# dataset fingerprint and only rebuilt when the data changes, in a cache of
+# their own bounded by total size (figures and pages use artifact_cache).
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+WRITE_CHUNK_ROWS = int(os.environ.get("URBAN_EXPORT_CHUNK_ROWS", 10_000))
+CACHE_BYTES = int(os.environ.get("URBAN_EXPORT_CACHE_MB", 64)) * 1024 * 1024
+
+_workbooks = OrderedDict()
+_cached_bytes = 0
+_lock = threading.Lock()
+
+
+# --- Conditional formatting rules ---
+# Indicator code -> rules applied to that indicator's column, whatever name
+# (display, database or WDI header) the exported frame uses for it.
+# "above_quantile" highlights cells above the column's quantile; the other
+# types are xlsxwriter conditional formats applied as-is.
+FormatRule = namedtuple("FormatRule", ["type", "quantile", "color"])
+
+FORMAT_RULES = {
+    "SL.UEM.TOTL.NE.ZS": [FormatRule("above_quantile", 0.75, "#FFC7CE"), FormatRule("data_bar", None, None)],
+    "IT.NET.USER.ZS": [FormatRule("above_quantile", 0.75, "#C6EFCE"), FormatRule("3_color_scale", None, None)],
+    "SP.URB.TOTL.IN.ZS": [FormatRule("3_color_scale", None, None)],
+    "SE.SEC.NENR": [FormatRule("3_color_scale", None, None)],
+    "SI.POV.GINI": [FormatRule("3_color_scale", None, None)],
+    "SL.TLF.CACT.FE.NE.ZS": [FormatRule("data_bar", None, None)],
+}
+
+_CODE_BY_COLUMN = {column: ind.code for ind in indicators.INDICATORS
+                   for column in (ind.name, ind.db_column, ind.header)}
+
+
+def matched_rules(columns, rules=None):
+    # [(column position, column, [FormatRule, ...]), ...] in sheet order
+    rules = FORMAT_RULES if rules is None else rules
+    matched = []
+    for position, column in enumerate(columns):
+        code = _CODE_BY_COLUMN.get(column, column)
+        if rules.get(code):
+            matched.append((position, column, rules[code]))
+    return matched
+
+
+def conditional_formats(workbook, worksheet, df, rules=None, formats=None):
+    # Applies every matched rule in one pass; all quantile thresholds come
+    # from a single quantile call. formats caches cell formats per workbook
+    # across sheets.
+    matched = matched_rules(df.columns, rules)
+    if df.empty or not matched:
+        return
+    formats = {} if formats is None else formats
+    levels = sorted({r.quantile for _, _, column_rules in matched for r in column_rules
+                     if r.type == "above_quantile"})
+    thresholds = None
+    if levels:
+        quantile_columns = [c for _, c, column_rules in matched
+                            if any(r.type == "above_quantile" for r in column_rules)]
+        thresholds = df[quantile_columns].apply(pd.to_numeric, errors="coerce").quantile(levels)
+
+    last_row = len(df)
+    for position, column, column_rules in matched:
+        cells = (1, position, last_row, position)
+        for rule in column_rules:
+            if rule.type == "above_quantile":
+                value = thresholds.at[rule.quantile, column]
+                if pd.isna(value):
+                    continue
+                if rule.color not in formats:
+                    formats[rule.color] = workbook.add_format({'bg_color': rule.color})
+                worksheet.conditional_format(*cells, {'type': 'cell', 'criteria': '>', 'value': float(value),
+                                                      'format': formats[rule.color]})
+            else:
+                worksheet.conditional_format(*cells, {'type': rule.type})
+
+
+def write_sheet(workbook, name, df, formats=None):
+    # constant_memory only accepts rows in order, so the frame is written
+    # row-wise (to_excel writes column by column); missing values stay blank.
+    # Rows are converted to Python values one chunk at a time, never the
+    # whole frame at once.
+    formats = {} if formats is None else formats
+    if "header" not in formats:
+        formats["header"] = workbook.add_format({'bold': True, 'border': 1})
+    worksheet = workbook.add_worksheet(name)
+    worksheet.write_row(0, 0, [str(c) for c in df.columns], formats["header"])
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start:start + WRITE_CHUNK_ROWS]
+        rows = chunk.astype(object).where(chunk.notna(), None)
+        for r, row in enumerate(rows.itertuples(index=False, name=None), start=start + 1):
+            worksheet.write_row(r, 0, row)
+    return worksheet
+
+
+def write_workbook(target, sheets):
+    # target is a path or a binary buffer; sheets maps sheet name -> frame
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+    formats = {}
+    for sheet_name, df in sheets.items():
+        worksheet = write_sheet(workbook, sheet_name, df, formats)
+        conditional_formats(workbook, worksheet, df, formats=formats)
+    workbook.close()
+
+
+def build_workbook(df, sheet_name='cleaned'):
+    buffer = io.BytesIO()
+    write_workbook(buffer, {sheet_name: df})
+    return buffer.getvalue()
+
+
+def workbook_bytes(fingerprint, name, df):
+    # df must be the frame described by (fingerprint, name); it is only read
+    # when the workbook is not already cached
+    global _cached_bytes
+    key = (fingerprint, name)
+    with _lock:
+        if key in _workbooks:
+            _workbooks.move_to_end(key)
+            return _workbooks[key]
+    data = build_workbook(df)
+    if len(data) > CACHE_BYTES:
+        return data
+    with _lock:
+        if key not in _workbooks:
+            _workbooks[key] = data
+            _cached_bytes += len(data)
+        while _cached_bytes > CACHE_BYTES:
+            _, evicted = _workbooks.popitem(last=False)
+            _cached_bytes -= len(evicted)
+    return data
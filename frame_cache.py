@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # optional: without pyarrow every cold start re-cleans the CSV
+    pa = None
+
+# --- On-disk cache of cleaned frames ---
+# Cleaned frames are stored as uncompressed Arrow IPC files named after the
+# source checksum and the cleaning-pipeline version, so restarts, replicas and
+# workers share one copy and load it with a memory map instead of a CSV parse.
+CACHE_DIR = os.environ.get("URBAN_CACHE_DIR", ".cache")
+_CHECKSUM_INDEX = "checksums.json"
+
+_lock = threading.Lock()
+
+
+def _cache_path(name):
+    return os.path.join(CACHE_DIR, name)
+
+
+def _read_checksum_index():
+    try:
+        with open(_cache_path(_CHECKSUM_INDEX)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(target, write):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def file_checksum(path):
+    # Hashing a multi-GB export is expensive, so the digest is remembered per
+    # (size, mtime) and only recomputed when the file actually changes.
+    stat = os.stat(path)
+    abspath = os.path.abspath(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    with _lock:
+        index = _read_checksum_index()
+        entry = index.get(abspath)
+        if entry and entry["stamp"] == stamp:
+            return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    checksum = digest.hexdigest()
+
+    with _lock:
+        index = _read_checksum_index()
+        index[abspath] = {"stamp": stamp, "sha256": checksum}
+
+        def write(tmp):
+            with open(tmp, "w") as f:
+                json.dump(index, f)
+        _write_atomic(_cache_path(_CHECKSUM_INDEX), write)
+    return checksum
+
+
+def cached_frame_path(name, source, version):
+    return _cache_path(f"{name}-{file_checksum(source)[:16]}-v{version}.arrow")
+
+
+def read_frame(path):
+    # The map is not closed here: it stays alive for as long as the frame's
+    # columns reference it, and split_blocks keeps numeric columns as views
+    # into the file instead of consolidating them into heap copies
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+def write_frame(df, path):
+    table = pa.Table.from_pandas(df)
+    # Missing floats are stored as NaN rather than nulls, so those columns
+    # need no validity bitmap and load without a copy
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count and field.name in df.columns:
+            table = table.set_column(i, field, pa.array(df[field.name].to_numpy(dtype=field.type.to_pandas_dtype())))
+
+    def write(tmp):
+        with pa.OSFile(tmp, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    _write_atomic(path, write)
+
+
+def load_or_build(name, source, version, build):
+    if pa is None:
+        return build()
+    path = cached_frame_path(name, source, version)
+    if os.path.exists(path):
+        try:
+            return read_frame(path)
+        except (OSError, pa.ArrowInvalid):
+            pass  # truncated or foreign file: rebuild it below
+    df = build()
+    try:
+        write_frame(df, path)
+        purge_stale(name, keep=path)
+    except (OSError, pa.ArrowException):
+        pass  # a read-only cache dir must never break the page
+    return df
+
+
+def purge_stale(name, keep):
+    # Remove older checksum/version variants of a cached frame
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for entry in os.listdir(CACHE_DIR):
+        if entry.startswith(f"{name}-") and entry.endswith(".arrow") and os.path.join(CACHE_DIR, entry) != keep:
+            try:
+                os.remove(os.path.join(CACHE_DIR, entry))
+            except OSError:
+                pass
@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+# --- Indicator registry ---
+# One entry per WDI series. Every page, the ingestion layer and the database
+# code derive their column names and parser options from here, so adding an
+# indicator is a one-line change.
+Indicator = namedtuple("Indicator", ["code", "header", "name", "db_column", "dtype", "dataset", "valid_range"])
+
+INDICATORS = [
+    Indicator("SP.URB.TOTL.IN.ZS",
+              "Urban population (% of total population) [SP.URB.TOTL.IN.ZS]",
+              "Urban Population", "urban_population", "float64", "primary", (0, 100)),
+    Indicator("SL.UEM.TOTL.NE.ZS",
+              "Unemployment, total (% of total labor force) (national estimate) [SL.UEM.TOTL.NE.ZS]",
+              "Unemployment Rate", "unemployment_rate", "float64", "primary", (0, 100)),
+    Indicator("IT.NET.USER.ZS",
+              "Individuals using the Internet (% of population) [IT.NET.USER.ZS]",
+              "Internet Users", "internet_usage", "float64", "primary", (0, 100)),
+    Indicator("SE.SEC.NENR",
+              "School enrollment, secondary (% net) [SE.SEC.NENR]",
+              "Secondary School Enrollment", "secondary_enrollment", "float64", "secondary", (0, 100)),
+    Indicator("SI.POV.GINI",
+              "Gini index [SI.POV.GINI]",
+              "Gini Index", "gini_index", "float64", "secondary", (0, 100)),
+    Indicator("SL.TLF.CACT.FE.NE.ZS",
+              "Labor force participation rate, female (% of female population ages 15+) (national estimate) [SL.TLF.CACT.FE.NE.ZS]",
+              "Female Labor Force Participation", "female_labor_force_participation", "float64", "secondary", (0, 100)),
+]
+
+BY_CODE = {ind.code: ind for ind in INDICATORS}
+BY_NAME = {ind.name: ind for ind in INDICATORS}
+
+
+def lookup(item, attr="code"):
+    # Field of the indicator registered under a code or a name; anything
+    # unregistered is returned as given
+    ind = BY_CODE.get(item) or BY_NAME.get(item)
+    return getattr(ind, attr) if ind is not None else item
+
+# WDI id columns every extract carries, and the names the analysis pages use
+ID_COLUMNS = ["Country Name", "Country Code", "Time", "Time Code"]
+PAGE_ID_NAMES = {"Time": "Year", "Country Name": "Country"}
+
+MISSING_SENTINELS = [".."]
+
+
+def for_dataset(dataset, names=None):
+    return [ind for ind in INDICATORS
+            if ind.dataset == dataset and (names is None or ind.name in names)]
+
+
+def names(dataset):
+    return [ind.name for ind in for_dataset(dataset)]
+
+
+def rename_map(dataset, target="name", names=None):
+    return {ind.header: getattr(ind, target) for ind in for_dataset(dataset, names)}
+
+
+def valid_ranges(names):
+    return {name: BY_NAME[name].valid_range for name in names if name in BY_NAME}
+
+
+def parser_options(dataset, names=None):
+    # Keyword arguments for pd.read_csv: only the id columns and the selected
+    # indicators are parsed, straight into their numeric dtype
+    selected = for_dataset(dataset, names)
+    return {
+        "usecols": ID_COLUMNS + [ind.header for ind in selected],
+        "dtype": {ind.header: ind.dtype for ind in selected},
+        "na_values": MISSING_SENTINELS,
+    }
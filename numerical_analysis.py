@@ -1,41 +1,39 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+import artifact_cache
+import data_loader
+import indicators
+import running_stats
+
+def _dataset_stats(dataset, df):
+    # Persisted per-country running state: only years newer than the stored
+    # state are folded in. The same states give the per-country table and,
+    # merged, the dataset summary; both are cached per dataset version.
+    columns = indicators.names(dataset)
+
+    def build():
+        store = running_stats.incremental(f"numerical_{dataset}", df, columns,
+                                          version=data_loader.CLEANING_VERSION)
+        by_country = pd.concat({key: store[key].summary() for key in sorted(store)},
+                               names=["Country Code", "indicator"]) if store else pd.DataFrame()
+        return running_stats.combine(store.values(), columns).result(), by_country
+    return artifact_cache.get_or_build((data_loader.fingerprint(dataset), "numerical_stats"), build)
+
 
 def show_numerical_analysis():
     st.title("Project Report: Data Preparation & Numerical Analysis")
 
     # Dataset 1
     st.header("1. Load and Clean Dataset 1")
-    df1 = pd.read_csv("datasets.csv")
-    mapping_df1 = {
-        "Urban population (% of total population) [SP.URB.TOTL.IN.ZS]": "Urban Population",
-        "Unemployment, total (% of total labor force) (national estimate) [SL.UEM.TOTL.NE.ZS]": "Unemployment Rate",
-        "Individuals using the Internet (% of population) [IT.NET.USER.ZS]": "Internet Users",
-        "Time": "Year",
-        "Country Name": "Country"
-    }
-    df1 = df1.rename(columns=mapping_df1)
-    for col in ["Urban Population", "Unemployment Rate", "Internet Users"]:
-        df1[col] = pd.to_numeric(df1[col], errors="coerce")
-    df1 = df1.dropna(subset=["Urban Population", "Unemployment Rate", "Internet Users"])
+    df1 = data_loader.load_indicators("primary").rename(columns=indicators.PAGE_ID_NAMES)
+    df1 = df1.dropna(subset=indicators.names("primary"))
     st.subheader("Cleaned Dataset 1")
     st.write(df1.head())
 
     # Dataset 2
     st.header("2. Load and Clean Dataset 2")
-    df2 = pd.read_csv("dataset2.csv")
-    mapping_df2 = {
-        "School enrollment, secondary (% net) [SE.SEC.NENR]": "Secondary Enrollment",
-        "Gini index [SI.POV.GINI]": "Gini Index",
-        "Labor force participation rate, female (% of female population ages 15+) (national estimate) [SL.TLF.CACT.FE.NE.ZS]": "Female Labor Force Participation",
-        "Time": "Year",
-        "Country Name": "Country"
-    }
-    df2 = df2.rename(columns=mapping_df2)
-    for col in ["Secondary Enrollment", "Gini Index", "Female Labor Force Participation"]:
-        df2[col] = pd.to_numeric(df2[col], errors="coerce")
-    df2 = df2.dropna(subset=["Secondary Enrollment", "Gini Index", "Female Labor Force Participation"])
+    df2 = data_loader.load_indicators("secondary").rename(columns=indicators.PAGE_ID_NAMES)
+    df2 = df2.dropna(subset=indicators.names("secondary"))
     st.subheader("Cleaned Dataset 2")
     st.write(df2.head())
 
@@ -44,32 +42,30 @@ def show_numerical_analysis():
 
     # Dataset 1
     st.subheader("Dataset 1 Analysis (Urban, Jobs, Internet)")
-    urban = df1["Urban Population"].to_numpy()
-    unemployment = df1["Unemployment Rate"].to_numpy()
-    internet = df1["Internet Users"].to_numpy()
-    st.write("Urban Population → Mean:", np.mean(urban), "Std:", np.std(urban))
-    st.write("Unemployment Rate → Mean:", np.mean(unemployment), "Std:", np.std(unemployment))
-    st.write("Internet Users → Mean:", np.mean(internet), "Std:", np.std(internet))
-    corr1 = np.corrcoef([urban, unemployment, internet])
+    result1, by_country1 = _dataset_stats("primary", df1)
+    st.write("Mean / Std and distribution (Dataset 1):")
+    st.dataframe(result1.summary)
     st.write("Correlation Matrix (Dataset 1):")
-    st.write(corr1)
-    urban_reshaped = urban.reshape(-1, 1)
+    st.write(result1.correlation)
+    urban_reshaped = df1["Urban Population"].to_numpy().reshape(-1, 1)
     st.write("Urban Population reshaped (first 5 rows):", urban_reshaped[:5])
 
     # Dataset 2
     st.subheader("Dataset 2 Analysis (Education, Inequality, Female Work)")
-    secondary = df2["Secondary Enrollment"].to_numpy()
-    gini = df2["Gini Index"].to_numpy()
-    female_lfp = df2["Female Labor Force Participation"].to_numpy()
-    st.write("Secondary Enrollment → Mean:", np.mean(secondary), "Std:", np.std(secondary))
-    st.write("Gini Index → Mean:", np.mean(gini), "Std:", np.std(gini))
-    st.write("Female LFP → Mean:", np.mean(female_lfp), "Std:", np.std(female_lfp))
-    corr2 = np.corrcoef([secondary, gini, female_lfp])
+    result2, by_country2 = _dataset_stats("secondary", df2)
+    st.write("Mean / Std and distribution (Dataset 2):")
+    st.dataframe(result2.summary)
     st.write("Correlation Matrix (Dataset 2):")
-    st.write(corr2)
-    secondary_reshaped = secondary.reshape(-1, 1)
+    st.write(result2.correlation)
+    secondary_reshaped = df2["Secondary School Enrollment"].to_numpy().reshape(-1, 1)
     st.write("Secondary Enrollment reshaped (first 5 rows):", secondary_reshaped[:5])
 
+    # Per country
+    st.subheader("Per-country Statistics")
+    for label, by_country in (("Dataset 1", by_country1), ("Dataset 2", by_country2)):
+        st.write(f"{label} by country:")
+        st.dataframe(by_country)
+
     # Insights
     st.header("4. Insights & Findings")
     st.markdown("""
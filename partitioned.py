@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import running_stats
+import stats
+
+# --- Per-country analysis on a process pool ---
+# The frame is sorted by country and its indicator columns copied once into a
+# shared-memory float64 block, so every country is a contiguous row range.
+# Workers attach to the block by name and receive only (start, stop) offsets,
+# never pickled frames; each returns its country's summary, correlation and a
+# mergeable RunningStats, which are combined into the all-country result.
+# Small inputs run inline, where a pool would cost more than it saves.
+WORKERS = int(os.environ.get("URBAN_ANALYSIS_WORKERS", os.cpu_count() or 1))
+MIN_PARALLEL_COUNTRIES = int(os.environ.get("URBAN_ANALYSIS_MIN_COUNTRIES", 8))
+# Workers are never forked from the (multithreaded) Streamlit server, where a
+# child could inherit a lock held by another thread and deadlock
+START_METHOD = os.environ.get("URBAN_ANALYSIS_START_METHOD", "forkserver")
+
+PartitionedResult = namedtuple("PartitionedResult", ["summary", "correlations", "overall"])
+
+
+def analyse_values(values, columns, impute=None):
+    # One country's analysis: optional per-column median fill, then the
+    # exact summary and correlation plus a mergeable state
+    if impute == "median" and len(values):
+        # Columns with no data for this country stay NaN (their median is NaN)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            fill = np.nanmedian(values, axis=0)
+        values = np.where(np.isnan(values), fill, values)
+    frame = pd.DataFrame(values, columns=columns)
+    result = stats.describe(frame, columns)
+    return result.summary, result.correlation, running_stats.RunningStats.from_frame(frame, columns)
+
+
+def _analyse_shards(name, shape, ranges, columns, impute):
+    # A batch of countries per task keeps scheduling and result transfer
+    # overhead below the per-country work
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        outcomes = [analyse_values(matrix[start:stop].copy(), columns, impute) for start, stop in ranges]
+        del matrix
+    finally:
+        block.close()
+    return outcomes
+
+
+def _shards(df, country):
+    codes = df[country].to_numpy()
+    bounds = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate([[0], bounds])
+    stops = np.concatenate([bounds, [len(codes)]])
+    return [(codes[a], int(a), int(b)) for a, b in zip(starts, stops)] if len(codes) else []
+
+
+def analyse_by_country(df, columns, country="Country Code", impute=None, workers=None):
+    workers = workers or WORKERS
+    df = df.dropna(subset=[country]).sort_values(country, kind="stable")
+    values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64))
+    shards = _shards(df, country)
+
+    if workers <= 1 or len(shards) < MIN_PARALLEL_COUNTRIES:
+        outcomes = [analyse_values(values[a:b], columns, impute) for _, a, b in shards]
+    else:
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        try:
+            np.ndarray(values.shape, dtype=np.float64, buffer=block.buf)[:] = values
+            ranges = [(a, b) for _, a, b in shards]
+            size = -(-len(ranges) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD)) as pool:
+                futures = [pool.submit(_analyse_shards, block.name, values.shape, ranges[i:i + size], columns, impute)
+                           for i in range(0, len(ranges), size)]
+                outcomes = [outcome for future in futures for outcome in future.result()]
+        finally:
+            block.close()
+            block.unlink()
+
+    codes = [code for code, _, _ in shards]
+    summary = pd.concat([o[0] for o in outcomes], keys=codes, names=[country, "indicator"]) \
+        if outcomes else pd.DataFrame()
+    correlations = dict(zip(codes, (o[1] for o in outcomes)))
+    overall = running_stats.combine((o[2] for o in outcomes), columns).result()
+    return PartitionedResult(summary, correlations, overall)
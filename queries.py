@@ -0,0 +1,328 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+import artifact_cache
+import schema
+
+# --- Canned analytics for the Database Integration page ---
+# Each query keeps its SQL text (the pushdown form) and, where it reads the raw
+# table, an equivalent pandas implementation. The page fetches a table once
+# and computes those results from that frame in one pass; decade averages are
+# read from the maintained decade rollup table instead of raw rows. Fetched
+# frames and results are cached per table version (row count + latest
+# updated_at), so repeated clicks on an unchanged table only cost the version
+# probe.
+CannedQuery = namedtuple("CannedQuery", ["title", "sql", "compute"])
+
+TABLE_COLUMNS = {
+    "SA_TrendsData": ("year", schema.TRENDS_COLUMNS),
+    "SA_SocialData": ("year", schema.SOCIAL_COLUMNS),
+}
+
+
+def _round_half_up(values, decimals=2):
+    # SQL ROUND on DECIMAL rounds halves away from zero
+    factor = 10 ** decimals
+    return np.sign(values) * np.floor(np.abs(values) * factor + 0.5) / factor
+
+
+def _averages(columns, aliases):
+    def compute(df):
+        return pd.DataFrame([_round_half_up(df[columns].mean().to_numpy())], columns=aliases)
+    return compute
+
+
+def _decade_rollup_sql(table, aliases):
+    # Decade averages across countries from the rollup's sums and counts
+    rollup, columns = schema.ROLLUPS[table]
+    averages = ",\n".join(f"ROUND(SUM(sum_{c}) / SUM(cnt_{c}), 2) AS {alias}"
+                           for c, alias in zip(columns, aliases))
+    return f"""
+            SELECT decade,
+            {averages}
+            FROM {rollup}
+            GROUP BY decade
+            ORDER BY decade
+            """
+
+
+def _rows_where(columns, condition):
+    def compute(df):
+        return df.loc[condition(df), columns].reset_index(drop=True)
+    return compute
+
+
+def _highest_unemployment(df):
+    ranked = df.dropna(subset=["unemployment_rate"])
+    return ranked.loc[[ranked["unemployment_rate"].idxmax()], ["year", "unemployment_rate"]].reset_index(drop=True) \
+        if len(ranked) else ranked[["year", "unemployment_rate"]]
+
+
+def _internet_growth(df):
+    return pd.DataFrame({
+        "growth_in_internet_usage": [df["internet_usage"].max() - df["internet_usage"].min()],
+        "start_year": [df["year"].min()],
+        "end_year": [df["year"].max()],
+    })
+
+
+def _enrollment_extremes(df):
+    values = df["secondary_enrollment"]
+    mask = (values == values.max()) | (values == values.min())
+    return df.loc[mask, ["year", "secondary_enrollment"]].reset_index(drop=True)
+
+
+def _rounded_yearly(df):
+    result = df[["year"]].copy()
+    result["secondary_enrollment"] = _round_half_up(df["secondary_enrollment"].to_numpy())
+    result["gini_index"] = _round_half_up(df["gini_index"].to_numpy())
+    result["female_labor_force"] = _round_half_up(df["female_labor_force_participation"].to_numpy())
+    return result.reset_index(drop=True)
+
+
+TRENDS_AVG_ALIASES = ["avg_urban_population", "avg_unemployment_rate", "avg_internet_usage"]
+SOCIAL_AVG_ALIASES = ["avg_secondary_enrollment", "avg_gini_index", "avg_female_labor_force"]
+
+CANNED = {
+    "SA_TrendsData": [
+        CannedQuery("Average Urban Population, Unemployment Rate & Internet Usage:", """
+            SELECT
+                ROUND(AVG(urban_population),2) AS avg_urban_population,
+                ROUND(AVG(unemployment_rate),2) AS avg_unemployment_rate,
+                ROUND(AVG(internet_usage),2) AS avg_internet_usage
+            FROM SA_TrendsData
+            """, _averages(TABLE_COLUMNS["SA_TrendsData"][1], TRENDS_AVG_ALIASES)),
+        CannedQuery("Year with Highest Unemployment Rate:", """
+            SELECT year, unemployment_rate
+            FROM SA_TrendsData
+            ORDER BY unemployment_rate DESC
+            LIMIT 1
+            """, _highest_unemployment),
+        CannedQuery("Growth in Internet Usage (from first to last year):", """
+            SELECT
+                (MAX(internet_usage) - MIN(internet_usage)) AS growth_in_internet_usage,
+                MIN(year) AS start_year,
+                MAX(year) AS end_year
+            FROM SA_TrendsData
+            """, _internet_growth),
+        CannedQuery("Years where Unemployment Rate was above 30%:", """
+            SELECT year, urban_population, unemployment_rate, internet_usage
+            FROM SA_TrendsData
+            WHERE unemployment_rate > 30
+            ORDER BY year
+            """, _rows_where(["year", "urban_population", "unemployment_rate", "internet_usage"],
+                             lambda df: df["unemployment_rate"] > 30)),
+        CannedQuery("Average Trends Grouped by Decade:",
+                    _decade_rollup_sql("SA_TrendsData", TRENDS_AVG_ALIASES), None),
+    ],
+    "SA_SocialData": [
+        CannedQuery("Average of all indicators (1975–2024):", """
+            SELECT
+                ROUND(AVG(secondary_enrollment),2) AS avg_secondary_enrollment,
+                ROUND(AVG(gini_index),2) AS avg_gini_index,
+                ROUND(AVG(female_labor_force_participation),2) AS avg_female_labor_force
+            FROM SA_SocialData
+            """, _averages(TABLE_COLUMNS["SA_SocialData"][1], SOCIAL_AVG_ALIASES)),
+        CannedQuery("Average Trends Grouped by Decade:",
+                    _decade_rollup_sql("SA_SocialData", SOCIAL_AVG_ALIASES), None),
+        CannedQuery("Years with Highest & Lowest Secondary Enrollment:", """
+            SELECT year, secondary_enrollment
+            FROM SA_SocialData
+            WHERE secondary_enrollment = (SELECT MAX(secondary_enrollment) FROM SA_SocialData)
+               OR secondary_enrollment = (SELECT MIN(secondary_enrollment) FROM SA_SocialData)
+            """, _enrollment_extremes),
+        CannedQuery("Years with Gini Index above 60 (high inequality):", """
+            SELECT year, gini_index
+            FROM SA_SocialData
+            WHERE gini_index > 60
+            ORDER BY year
+            """, _rows_where(["year", "gini_index"], lambda df: df["gini_index"] > 60)),
+        CannedQuery("Full Yearly Dataset (to inspect relationships manually):", """
+            SELECT year,
+                   ROUND(secondary_enrollment,2) AS secondary_enrollment,
+                   ROUND(gini_index,2) AS gini_index,
+                   ROUND(female_labor_force_participation,2) AS female_labor_force
+            FROM SA_SocialData
+            ORDER BY year
+            """, _rounded_yearly),
+        CannedQuery("Years when Female Labor Force Participation exceeded 50%:", """
+            SELECT year, female_labor_force_participation
+            FROM SA_SocialData
+            WHERE female_labor_force_participation > 50
+            ORDER BY year
+            """, _rows_where(["year", "female_labor_force_participation"],
+                             lambda df: df["female_labor_force_participation"] > 50)),
+    ],
+}
+
+
+def _read_numeric(sql, engine):
+    # MySQL returns DECIMAL aggregates as Decimal objects
+    return pd.read_sql(sql, engine).apply(pd.to_numeric, errors="coerce")
+
+
+# --- Version-keyed cache ---
+_cache = {}
+_lock = threading.Lock()
+
+
+def table_version(engine, table):
+    # Row count plus the latest updated_at (indexed, see schema migration 5);
+    # callers that need it more than once per render pass it along
+    with engine.connect() as conn:
+        count, updated = conn.execute(text(f"SELECT COUNT(*), MAX(updated_at) FROM {table}")).one()
+    return count, str(updated)
+
+
+def _cached(engine, table, kind, build):
+    key = (str(engine.url), table, kind)
+    version = table_version(engine, table)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+    value = build()
+    with _lock:
+        _cache[key] = (version, value)
+    return value
+
+
+def _select(table, where=""):
+    year, columns = TABLE_COLUMNS[table]
+    return (f"SELECT {', '.join(['country_code', year] + columns)} FROM {table} {where}"
+            f"ORDER BY country_code, {year}")
+
+
+def fetch_table(engine, table):
+    # The data columns of the whole table ordered by country and year, in one
+    # round-trip
+    columns = TABLE_COLUMNS[table][1]
+
+    def build():
+        df = pd.read_sql(_select(table), engine)
+        df[columns] = df[columns].apply(pd.to_numeric, errors="coerce").astype("float64")
+        return df
+    return _cached(engine, table, "frame", build)
+
+
+# --- Streaming and paged reads ---
+# Rows are read with stream_results in chunks. That is a server-side cursor
+# only on drivers that support one (pymysql, mysqlclient, psycopg2; SQLite
+# reads incrementally anyway); mysql-connector ignores it and buffers the
+# result client-side, so use a mysql+pymysql:// URL for very large tables.
+# Pages are read by key: each page starts after the (country_code, year) of
+# the previous page's last row, recorded as pages are read, so a page costs
+# an index seek rather than an OFFSET scan. The requested page plus
+# PREFETCH_PAGES following pages are read in one window and each is cached,
+# so paging forward is usually served from memory. Jumping straight to a page
+# whose start key is not known yet falls back to OFFSET once.
+PAGE_ROWS = int(os.environ.get("URBAN_DB_PAGE_ROWS", 100))
+PREFETCH_PAGES = int(os.environ.get("URBAN_DB_PREFETCH_PAGES", 2))
+
+
+def stream_table(engine, table, chunksize=None, offset=0, limit=None, after=None):
+    # Yields the ordered table in frames of at most chunksize rows, starting
+    # after the (country_code, year) key `after` when given
+    chunksize = chunksize or PAGE_ROWS
+    year, columns = TABLE_COLUMNS[table]
+    params = {}
+    where = ""
+    if after is not None:
+        where = f"WHERE country_code > :code OR (country_code = :code AND {year} > :year) "
+        params = {"code": after[0], "year": int(after[1])}
+    sql = _select(table, where)
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}" + (f" OFFSET {int(offset)}" if offset else "")
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        for chunk in pd.read_sql(text(sql), conn, params=params, chunksize=chunksize):
+            chunk[columns] = chunk[columns].apply(pd.to_numeric, errors="coerce").astype("float64")
+            yield chunk
+
+
+def page_count(engine, table, page_rows=None, version=None):
+    rows = (version or table_version(engine, table))[0]
+    return max(-(-rows // (page_rows or PAGE_ROWS)), 1)
+
+
+def fetch_page(engine, table, page, page_rows=None, version=None):
+    # One page (0-based) of the ordered table; a miss streams this page and
+    # the next PREFETCH_PAGES pages and caches each of them along with the
+    # key the page after it starts from
+    page_rows = page_rows or PAGE_ROWS
+    key = (str(engine.url), table, version or table_version(engine, table), page_rows)
+    df = artifact_cache.get(key + (page,))
+    if df is None:
+        year = TABLE_COLUMNS[table][0]
+        after = artifact_cache.get(key + ("after", page)) if page else None
+        window = stream_table(engine, table, page_rows, limit=(1 + PREFETCH_PAGES) * page_rows, after=after,
+                              offset=page * page_rows if page and after is None else 0)
+        for i, chunk in enumerate(window):
+            chunk = chunk.reset_index(drop=True)
+            artifact_cache.put(key + (page + i,), chunk)
+            last = chunk.iloc[-1]
+            artifact_cache.put(key + ("after", page + i + 1), (last["country_code"], last[year]))
+            if i == 0:
+                df = chunk
+    if df is None:
+        year, columns = TABLE_COLUMNS[table]
+        df = pd.DataFrame(columns=["country_code", year] + columns)
+    return df
+
+
+# --- Concurrent canned queries ---
+# Independent queries run on a thread pool over the pooled engine, and
+# results are yielded as each one completes, with its own latency. Tables
+# above PUSHDOWN_ROWS run every query's SQL on the server; smaller ones are
+# fetched once and computed locally, with only the rollup queries sent.
+QUERY_WORKERS = int(os.environ.get("URBAN_DB_QUERY_WORKERS", 4))
+PUSHDOWN_ROWS = int(os.environ.get("URBAN_DB_PUSHDOWN_ROWS", 50000))
+
+CannedResult = namedtuple("CannedResult", ["position", "title", "result", "seconds", "cached"])
+
+
+def _timed(run):
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def run_canned(engine, table, workers=None):
+    # Yields a CannedResult per canned query on the table, in completion order
+    key = (str(engine.url), table, "canned")
+    version = table_version(engine, table)
+    with _lock:
+        hit = _cache.get(key)
+    if hit is not None and hit[0] == version:
+        for done in hit[1]:
+            yield done._replace(cached=True)
+        return
+
+    df = fetch_table(engine, table) if version[0] <= PUSHDOWN_ROWS else None
+    completed = []
+    with ThreadPoolExecutor(max_workers=workers or QUERY_WORKERS) as pool:
+        futures = {}
+        for position, query in enumerate(CANNED[table]):
+            if df is not None and query.compute:
+                run = partial(query.compute, df)
+            else:
+                run = partial(_read_numeric, query.sql, engine)
+            futures[pool.submit(_timed, run)] = (position, query.title)
+        for future in as_completed(futures):
+            result, seconds = future.result()
+            done = CannedResult(*futures[future], result, seconds, False)
+            completed.append(done)
+            yield done
+    with _lock:
+        _cache[key] = (version, sorted(completed))
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
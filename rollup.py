@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import indicators
+
+# --- Pre-aggregated rollup cube ---
+# One row per (country, indicator, decade, year) holding the count, sum,
+# min, max and sum of squares of the observed values. The cube is built once
+# per dataset version; every coarser summary (decade averages, yearly trend
+# means, per-country totals) is a re-aggregation of its rows, and drilling
+# down is the same call with a finer grouping and the parent as a filter:
+#   aggregate(cube, ["decade", "indicator"])
+#   aggregate(cube, ["year", "indicator"], decades=[1990])
+# Indicators are stored by code, like the long store.
+LEVELS = ["country", "indicator", "decade", "year"]
+MEASURES = ["count", "sum", "min", "max", "sumsq"]
+
+
+def build(long):
+    # Cube from the (country, indicator, year) long store
+    observed = long.loc[long["value"].notna(), ["value"]].reset_index()
+    observed["decade"] = (observed["year"] // 10 * 10).astype("int16")
+    observed["sumsq"] = observed["value"] * observed["value"]
+    grouped = observed.groupby(LEVELS, observed=True, sort=True)
+    cube = grouped["value"].agg(["count", "sum", "min", "max"])
+    cube["sumsq"] = grouped["sumsq"].sum()
+    return cube
+
+
+def from_wide(df, columns, country="Country Code", year="Year"):
+    # Cube from a wide frame (one column per indicator), e.g. a page's own
+    # cleaned frame
+    long = df.dropna(subset=[country, year]).melt(
+        id_vars=[country, year], value_vars=list(columns), var_name="indicator", value_name="value")
+    long = long.rename(columns={country: "country", year: "year"})
+    long["indicator"] = long["indicator"].map(indicators.lookup).astype("category")
+    long["year"] = long["year"].astype("int16")
+    long["value"] = long["value"].astype("float64")
+    return build(long.set_index(["country", "indicator", "year"]))
+
+
+def aggregate(cube, by=(), countries=None, selection=None, decades=None, years=None):
+    # Summary over the selected cells, grouped by any of LEVELS; selection
+    # holds indicator codes or names, years is an inclusive (low, high) range.
+    # Adds mean and (population) std.
+    by = list(by)
+    unknown = [level for level in by if level not in LEVELS]
+    if unknown:
+        raise ValueError(f"Unknown rollup level(s): {unknown}")
+    mask = np.ones(len(cube), dtype=bool)
+    for level, values in (("country", countries), ("decade", decades),
+                          ("indicator", None if selection is None else [indicators.lookup(i) for i in selection])):
+        if values is not None:
+            mask &= cube.index.get_level_values(level).isin(values)
+    if years is not None:
+        year = cube.index.get_level_values("year")
+        mask &= (year >= years[0]) & (year <= years[1])
+    cells = cube[mask]
+
+    if by:
+        grouped = cells.groupby(level=by, observed=True, sort=True)
+        result = grouped[["count", "sum", "sumsq"]].sum()
+        result["min"] = grouped["min"].min()
+        result["max"] = grouped["max"].max()
+    else:
+        result = pd.DataFrame({"count": [cells["count"].sum()], "sum": [cells["sum"].sum()],
+                               "sumsq": [cells["sumsq"].sum()], "min": [cells["min"].min()],
+                               "max": [cells["max"].max()]})
+    result = result[MEASURES]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result["mean"] = result["sum"] / result["count"]
+        variance = result["sumsq"] / result["count"] - result["mean"] ** 2
+        result["std"] = np.sqrt(variance.clip(lower=0))
+    return result
+
+
+def table(cube, by, measure="mean", **filters):
+    # One row per value of `by` and one column per indicator (by name)
+    result = aggregate(cube, [by, "indicator"], **filters)[measure].unstack("indicator")
+    result.columns = [indicators.lookup(code, "name") for code in result.columns]
+    return result
+
+
+def trend(cube, columns, measure="mean", **filters):
+    # Yearly series per indicator, in the order given
+    result = table(cube, "year", measure, selection=columns, **filters)
+    return result.reindex(columns=[indicators.lookup(c, "name") for c in columns])
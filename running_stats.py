@@ -0,0 +1,254 @@
+import os
+import warnings
+import zipfile
+import numpy as np
+import pandas as pd
+import frame_cache
+import indicators
+import stats
+
+# --- Mergeable running statistics ---
+# RunningStats holds, for every indicator pair (i, j), the joint row count,
+# the mean and M2 of i over the rows where both are present, and their
+# co-moment (diagonals are the per-indicator moments). Batches are added and
+# states merged with Chan's parallel Welford update, so a state built from
+# countries, decades or appended years combines into the same result as one
+# pass over all rows. Quantiles come from a fixed-grid histogram sketch over
+# each indicator's valid range (error at most one bin width).
+SKETCH_BINS = int(os.environ.get("URBAN_STATS_SKETCH_BINS", 400))
+DEFAULT_RANGE = (0, 100)
+
+
+class RunningStats:
+    def __init__(self, columns, ranges=None, bins=None):
+        self.columns = list(columns)
+        k = len(self.columns)
+        ranges = ranges or indicators.valid_ranges(self.columns)
+        self.edges = np.array([ranges.get(c, DEFAULT_RANGE) for c in self.columns], dtype=np.float64).reshape(k, 2)
+        self.bins = bins or SKETCH_BINS
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+        self.minimum = np.full(k, np.nan)
+        self.maximum = np.full(k, np.nan)
+        self.sketch = np.zeros((k, self.bins), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df, columns, ranges=None, bins=None):
+        return cls(columns, ranges, bins).update(df)
+
+    def _combine(self, n, mean, m2, comoment):
+        # Chan et al.: merge (n, mean, M2, C) of another sample into this one
+        total = self.n + n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(total > 0, n / total, 0.0)
+        delta = np.where(n > 0, mean - self.mean, 0.0)
+        weight = self.n * share
+        self.mean = self.mean + delta * share
+        self.m2 = self.m2 + m2 + delta * delta * weight
+        self.comoment = self.comoment + comoment + delta * delta.T * weight
+        self.n = total
+
+    def update(self, df):
+        # Adds the rows of df in O(rows x indicators^2); returns self
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        if not len(values):
+            return self
+        present = ~np.isnan(values)
+        self._combine(*stats.pairwise_moments(values))
+
+        with np.errstate(invalid="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+            self.minimum = np.fmin(self.minimum, np.nanmin(values, axis=0))
+            self.maximum = np.fmax(self.maximum, np.nanmax(values, axis=0))
+        low, high = self.edges[:, 0], self.edges[:, 1]
+        position = np.floor((values - low) / (high - low) * self.bins)
+        cells = np.clip(np.nan_to_num(position), 0, self.bins - 1).astype(np.int64) + np.arange(len(self.columns)) * self.bins
+        self.sketch += np.bincount(cells[present], minlength=self.sketch.size).reshape(self.sketch.shape)
+        return self
+
+    def merge(self, other):
+        # A new state equal to one pass over both samples
+        if other.columns != self.columns or other.bins != self.bins:
+            raise ValueError("Only states over the same indicators and sketch can be merged")
+        merged = self.copy()
+        merged._combine(other.n, other.mean, other.m2, other.comoment)
+        merged.minimum = np.fmin(self.minimum, other.minimum)
+        merged.maximum = np.fmax(self.maximum, other.maximum)
+        merged.sketch = self.sketch + other.sketch
+        return merged
+
+    def copy(self):
+        clone = RunningStats.__new__(RunningStats)
+        clone.__dict__.update({k: v.copy() if isinstance(v, np.ndarray) else v
+                               for k, v in self.__dict__.items()})
+        clone.columns = list(self.columns)
+        return clone
+
+    def _order_statistic(self, counts, rank):
+        # Approximate value of the rank-th smallest sample (1-based) per
+        # column, interpolated within the sketch bin that holds it
+        columns = np.arange(len(self.columns))
+        cell = np.minimum((counts < rank[:, None]).sum(axis=1), self.bins - 1)
+        before = np.where(cell > 0, counts[columns, np.maximum(cell - 1, 0)], 0)
+        inside = self.sketch[columns, cell]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.where(inside > 0, (rank - before - 0.5) / inside, 0.5)
+        low, high = self.edges[:, 0], self.edges[:, 1]
+        return low + (cell + fraction) * (high - low) / self.bins
+
+    def quantiles(self, qs):
+        # Linear interpolation between neighbouring order statistics, like
+        # numpy's default; each is accurate to one sketch bin
+        counts = self.sketch.cumsum(axis=1)
+        total = counts[:, -1]
+        result = np.full((len(qs), len(self.columns)), np.nan)
+        for i, q in enumerate(qs):
+            position = q * np.maximum(total - 1, 0)
+            below = np.floor(position)
+            lower = self._order_statistic(counts, below + 1)
+            upper = self._order_statistic(counts, np.minimum(below + 2, np.maximum(total, 1)))
+            value = lower + (upper - lower) * (position - below)
+            result[i] = np.where(total > 0, value, np.nan)
+        return np.clip(result, self.minimum, self.maximum)
+
+    def summary(self, qs=(0.25, 0.5, 0.75)):
+        count = np.diag(self.n)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, np.diag(self.mean), np.nan)
+            std = np.sqrt(np.diag(self.m2) / count)
+        summary = pd.DataFrame({"count": count.astype(np.int64), "mean": mean, "std": std,
+                                "min": self.minimum}, index=self.columns)
+        for q, row in zip(qs, self.quantiles(qs)):
+            summary[f"{q:.0%}"] = row
+        summary["max"] = self.maximum
+        return summary
+
+    def correlation(self):
+        corr = stats.moment_correlation(self.n, self.m2, self.comoment)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def result(self, qs=(0.25, 0.5, 0.75)):
+        # The same typed result as stats.describe
+        return stats.StatsResult(self.summary(qs), self.correlation(),
+                                 pd.DataFrame(self.n.astype(np.int64), index=self.columns, columns=self.columns))
+
+    def to_arrays(self, prefix=""):
+        arrays = {f"{prefix}{name}": getattr(self, name)
+                  for name in ("n", "mean", "m2", "comoment", "minimum", "maximum", "sketch", "edges")}
+        arrays[f"{prefix}columns"] = np.array(self.columns)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=""):
+        state = cls.__new__(cls)
+        for name in ("n", "mean", "m2", "comoment", "minimum", "maximum", "sketch", "edges"):
+            setattr(state, name, arrays[f"{prefix}{name}"])
+        state.columns = [str(c) for c in arrays[f"{prefix}columns"]]
+        state.bins = state.sketch.shape[1]
+        return state
+
+
+def partition(df, columns, by, ranges=None, bins=None):
+    # {partition key: RunningStats} for each group of df
+    return {key if isinstance(key, tuple) else (key,): RunningStats.from_frame(rows, columns, ranges, bins)
+            for key, rows in df.groupby(by, sort=True)}
+
+
+def combine(states, columns=None):
+    states = list(states)
+    if not states:
+        return RunningStats(columns or [])
+    total = states[0].copy()
+    for state in states[1:]:
+        total = total.merge(state)
+    return total
+
+
+# --- Persisted per-country state ---
+# Stored next to the cleaned-frame cache: per country, the state, the last
+# year folded in, and the row count and an order-independent hash (sum of row
+# hashes) of the rows folded so far. Loading a dataset that only gained newer
+# years updates just the affected countries with just those rows. A country
+# whose already-folded rows changed (a revised value, a back-filled older
+# year, a removed row) no longer matches its count or hash and is rebuilt
+# from its rows; a different indicator set or version rebuilds everything.
+def _store_path(name):
+    return os.path.join(frame_cache.CACHE_DIR, f"stats_{name}.npz")
+
+
+def save_store(name, store, marks, version):
+    # marks: {country: (last year, rows folded, row hash)}
+    keys = list(store)
+    arrays = {"version": np.array(str(version)), "keys": np.array(keys, dtype=object).astype(str),
+              "watermarks": np.array([marks[k][0] for k in keys], dtype=np.float64),
+              "rows": np.array([marks[k][1] for k in keys], dtype=np.int64),
+              "digests": np.array([marks[k][2] for k in keys], dtype=np.uint64)}
+    for i, state in enumerate(store.values()):
+        arrays.update(state.to_arrays(f"{i}_"))
+
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+    frame_cache._write_atomic(_store_path(name), write)
+
+
+def load_store(name, version):
+    # ({country: RunningStats}, {country: (last year, rows, row hash)}), empty
+    # when missing, unreadable or written for another version
+    try:
+        with np.load(_store_path(name)) as arrays:
+            if str(arrays["version"]) != str(version):
+                return {}, {}
+            keys = [str(k) for k in arrays["keys"]]
+            store = {k: RunningStats.from_arrays(arrays, f"{i}_") for i, k in enumerate(keys)}
+            marks = zip(arrays["watermarks"].tolist(), arrays["rows"].tolist(), arrays["digests"].tolist())
+            return store, dict(zip(keys, marks))
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        return {}, {}
+
+
+def _row_hashes(df, columns, year):
+    return pd.util.hash_pandas_object(df[[year] + list(columns)], index=False).to_numpy()
+
+
+def incremental(name, df, columns, country="Country Code", year="Year", version=None):
+    # Per-country states for df, folding in only rows newer than what the
+    # persisted store has seen; returns {country: RunningStats}
+    version = (tuple(columns), version)
+    store, marks = load_store(name, version)
+    df = df.dropna(subset=[country, year])
+    keys = df[country].to_numpy()
+    years = df[year].astype(np.float64).to_numpy()
+    hashes = _row_hashes(df, columns, year)
+
+    # Check the rows at or before each stored watermark against what was folded
+    seen = df[country].map({k: m[0] for k, m in marks.items()}).astype(np.float64).to_numpy()
+    old = years <= seen
+    folded = pd.DataFrame({"key": keys[old], "digest": hashes[old]}).groupby("key")["digest"].agg(["size", "sum"])
+    changed = False
+    for key in list(marks):
+        current = (int(folded.at[key, "size"]), int(folded.at[key, "sum"])) if key in folded.index else (0, 0)
+        if current != marks[key][1:]:
+            del store[key], marks[key]
+            changed = True
+
+    seen = df[country].map({k: m[0] for k, m in marks.items()}).astype(np.float64).to_numpy()
+    new = ~(years <= seen)
+    if new.any():
+        new_rows = df[new].assign(_hash=hashes[new])
+        for key, rows in new_rows.groupby(country, sort=True):
+            state = store.get(key) or RunningStats(columns)
+            store[key] = state.update(rows)
+            _, count, digest = marks.get(key, (None, 0, 0))
+            # uint64 array sums wrap around, matching the groupby check above
+            digest = int(np.array([digest, rows["_hash"].to_numpy().sum()], dtype=np.uint64).sum())
+            marks[key] = (float(rows[year].max()), count + len(rows), digest)
+        changed = True
+    if changed:
+        try:
+            save_store(name, store, marks, version)
+        except OSError:
+            pass  # only a cache, as in frame_cache.load_or_build
+    return store
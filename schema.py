@@ -0,0 +1,178 @@
+from sqlalchemy import inspect, text
+
+# --- Versioned schema migrations ---
+# Applied in order, once each, and recorded in schema_migrations. Every
+# statement is plain SQL that runs on both MySQL and SQLite.
+LEGACY_COUNTRY = "ZAF"  # rows loaded before the country key existed are South Africa
+
+TRENDS_COLUMNS = ["urban_population", "unemployment_rate", "internet_usage"]
+SOCIAL_COLUMNS = ["secondary_enrollment", "gini_index", "female_labor_force_participation"]
+
+# Raw table -> (rollup table, aggregated columns)
+ROLLUPS = {
+    "SA_TrendsData": ("SA_TrendsDecade", TRENDS_COLUMNS),
+    "SA_SocialData": ("SA_SocialDecade", SOCIAL_COLUMNS),
+}
+
+# Portable FLOOR(year/10)*10 for positive years
+DECADE_SQL = "(year - year % 10)"
+
+
+def _baseline(conn):
+    # The original single-country tables, plus change tracking for the
+    # query cache's table version
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS SA_TrendsData (
+            year INT PRIMARY KEY,
+            urban_population DECIMAL(6,3),
+            unemployment_rate DECIMAL(6,3),
+            internet_usage DECIMAL(6,3)
+        )
+    """))
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS SA_SocialData (
+            Year INT PRIMARY KEY,
+            `Secondary Enrollment` DECIMAL(6,3),
+            `Gini Index` DECIMAL(6,3),
+            `Female Labor Force Participation` DECIMAL(6,3)
+        )
+    """))
+    inspector = inspect(conn)
+    for table in ("SA_TrendsData", "SA_SocialData"):
+        if "updated_at" not in {c["name"] for c in inspector.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at TIMESTAMP NULL"))
+
+
+def _rebuild(conn, table, columns, copy_select):
+    # Portable table rebuild: create, copy, drop, rename. MySQL commits each
+    # DDL statement, so the steps must be safe to re-run after a failure.
+    tables = set(inspect(conn).get_table_names())
+    if table not in tables and f"{table}_new" in tables:
+        # Failed between DROP and RENAME: the copy is complete, finish it
+        conn.execute(text(f"ALTER TABLE {table}_new RENAME TO {table}"))
+        return
+    conn.execute(text(f"DROP TABLE IF EXISTS {table}_new"))
+    definitions = ",\n".join(f"{c} DECIMAL(6,3)" for c in columns)
+    conn.execute(text(f"""
+        CREATE TABLE {table}_new (
+            country_code VARCHAR(3) NOT NULL,
+            year INT NOT NULL,
+            {definitions},
+            updated_at TIMESTAMP NULL,
+            PRIMARY KEY (country_code, year)
+        )
+    """))
+    conn.execute(text(f"""
+        INSERT INTO {table}_new (country_code, year, {", ".join(columns)}, updated_at)
+        {copy_select}
+    """))
+    conn.execute(text(f"DROP TABLE {table}"))
+    conn.execute(text(f"ALTER TABLE {table}_new RENAME TO {table}"))
+
+
+def _country_key(conn):
+    # (country_code, year) primary key and snake_case column names
+    _rebuild(conn, "SA_TrendsData", TRENDS_COLUMNS, f"""
+        SELECT '{LEGACY_COUNTRY}', year, urban_population, unemployment_rate, internet_usage, updated_at
+        FROM SA_TrendsData
+    """)
+    _rebuild(conn, "SA_SocialData", SOCIAL_COLUMNS, f"""
+        SELECT '{LEGACY_COUNTRY}', Year, `Secondary Enrollment`, `Gini Index`,
+               `Female Labor Force Participation`, updated_at
+        FROM SA_SocialData
+    """)
+
+
+def _indicator_indexes(conn):
+    # Serve the threshold filters and MAX/MIN lookups from indexes
+    for statement in (
+        "CREATE INDEX ix_trends_unemployment ON SA_TrendsData (unemployment_rate)",
+        "CREATE INDEX ix_trends_internet ON SA_TrendsData (internet_usage)",
+        "CREATE INDEX ix_social_enrollment ON SA_SocialData (secondary_enrollment)",
+        "CREATE INDEX ix_social_gini ON SA_SocialData (gini_index)",
+        "CREATE INDEX ix_social_female_lfp ON SA_SocialData (female_labor_force_participation)",
+    ):
+        conn.execute(text(statement))
+
+
+def _decade_rollups(conn):
+    # Per (country, decade) counts and sums, kept current by the loader
+    for table, (rollup, columns) in ROLLUPS.items():
+        aggregates = ",\n".join(f"sum_{c} DECIMAL(12,3), cnt_{c} INT" for c in columns)
+        conn.execute(text(f"""
+            CREATE TABLE {rollup} (
+                country_code VARCHAR(3) NOT NULL,
+                decade INT NOT NULL,
+                row_count INT NOT NULL,
+                {aggregates},
+                PRIMARY KEY (country_code, decade)
+            )
+        """))
+        refresh_rollup(conn, table)
+
+
+def _version_indexes(conn):
+    # The table-version probe (queries.table_version) reads MAX(updated_at)
+    # off an index instead of scanning the table
+    conn.execute(text("CREATE INDEX ix_trends_updated_at ON SA_TrendsData (updated_at)"))
+    conn.execute(text("CREATE INDEX ix_social_updated_at ON SA_SocialData (updated_at)"))
+
+
+MIGRATIONS = [
+    (1, "baseline tables with updated_at", _baseline),
+    (2, "(country_code, year) key and snake_case columns", _country_key),
+    (3, "indexes on filtered indicator columns", _indicator_indexes),
+    (4, "decade rollup tables", _decade_rollups),
+    (5, "updated_at indexes for the version probe", _version_indexes),
+]
+
+
+def refresh_rollup(conn, table, decades=None):
+    # Recompute the rollup rows for the given decades (all when None)
+    rollup, columns = ROLLUPS[table]
+    where = ""
+    if decades is not None:
+        decades = sorted({int(d) for d in decades})
+        if not decades:
+            return
+        where = f"WHERE {DECADE_SQL} IN ({', '.join(str(d) for d in decades)})"
+        conn.execute(text(f"DELETE FROM {rollup} WHERE decade IN ({', '.join(str(d) for d in decades)})"))
+    else:
+        conn.execute(text(f"DELETE FROM {rollup}"))
+    aggregates = ", ".join(f"SUM({c}), COUNT({c})" for c in columns)
+    targets = ", ".join(f"sum_{c}, cnt_{c}" for c in columns)
+    conn.execute(text(f"""
+        INSERT INTO {rollup} (country_code, decade, row_count, {targets})
+        SELECT country_code, {DECADE_SQL}, COUNT(*), {aggregates}
+        FROM {table}
+        {where}
+        GROUP BY country_code, {DECADE_SQL}
+    """))
+
+
+def current_version(conn):
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def migrate(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT PRIMARY KEY,
+                description VARCHAR(255),
+                applied_at TIMESTAMP NULL
+            )
+        """))
+        applied = current_version(conn)
+    for version, description, upgrade in MIGRATIONS:
+        if version <= applied:
+            continue
+        # MySQL commits DDL implicitly, so each migration is recorded as soon
+        # as it has run
+        with engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) "
+                     "VALUES (:version, :description, CURRENT_TIMESTAMP)"),
+                {"version": version, "description": description},
+            )
@@ -0,0 +1,110 @@
+import warnings
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+import indicators
+
+# --- Vectorized descriptive statistics ---
+# The selected indicators are stacked into one contiguous float64 matrix
+# (rows x indicators). Moments and quantiles are column reductions over it,
+# and the full correlation matrix comes from a few matrix products over the
+# NaN mask, so every pair uses all rows where both indicators are present
+# (no row is dropped because some other indicator is missing).
+QUANTILES = (0.25, 0.5, 0.75)
+
+# summary: one row per indicator (count, mean, std, min, quantiles, max)
+# correlation / pair_counts: indicator x indicator frames
+StatsResult = namedtuple("StatsResult", ["summary", "correlation", "pair_counts"])
+
+
+def resolve(df, selection=None):
+    # Column names in df for registered indicators, given by code or name
+    if selection is None:
+        return [ind.name for ind in indicators.INDICATORS if ind.name in df.columns]
+    columns = []
+    for item in selection:
+        column = indicators.lookup(item, "name")
+        if column not in df.columns:
+            raise KeyError(f"{item!r} is not a column of the frame")
+        columns.append(column)
+    return columns
+
+
+def stack(df, columns):
+    # Column-major, so each indicator's values are contiguous
+    return np.asfortranarray(df[columns].to_numpy(dtype=np.float64))
+
+
+def sorted_quantiles(ordered, count, quantiles):
+    # Linear-interpolated quantiles from column-sorted values (NaNs last)
+    columns = np.arange(ordered.shape[1])
+    position = np.asarray(quantiles, dtype=np.float64)[:, None] * np.maximum(count - 1, 0)
+    low = np.floor(position).astype(np.int64)
+    high = np.minimum(low + 1, np.maximum(count - 1, 0))
+    fraction = position - low
+    result = ordered[low, columns] * (1 - fraction) + ordered[high, columns] * fraction
+    result[:, count == 0] = np.nan
+    return result
+
+
+def pairwise_moments(values, shift=None):
+    # For every column pair (i, j) over the rows where both are present: the
+    # row count, the mean and M2 of column i, and the co-moment of i and j
+    # (diagonals are the per-column moments); returns (n, mean, m2, comoment)
+    present = ~np.isnan(values)
+    mask = present.astype(np.float64)
+    # Centre on the column means first to keep the sums well conditioned
+    if shift is None:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            shift = np.nanmean(values, axis=0)
+    shift = np.nan_to_num(shift)
+    centred = np.where(present, values - shift, 0.0)
+    n = mask.T @ mask
+    sums = centred.T @ mask           # sums[i, j]: sum of column i where j is present
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, sums / n, 0.0)
+    m2 = (centred * centred).T @ mask - sums * mean
+    comoment = centred.T @ centred - sums * mean.T
+    return n, mean + shift[:, None], m2, comoment
+
+
+def moment_correlation(n, m2, comoment):
+    # Pearson correlation from pairwise moments (see pairwise_moments)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = comoment / np.sqrt(m2 * m2.T)
+    corr[n < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def pairwise_correlation(values, mean=None):
+    # Pearson correlation of every column pair over their jointly present
+    # rows; returns (correlation, pair counts)
+    n, _, m2, comoment = pairwise_moments(values, mean)
+    return moment_correlation(n, m2, comoment), n.astype(np.int64)
+
+
+def describe(df, selection=None, quantiles=QUANTILES):
+    columns = resolve(df, selection)
+    values = stack(df, columns)
+    if not len(values):
+        values = np.full((1, len(columns)), np.nan, order="F")
+    count = (~np.isnan(values)).sum(axis=0)
+    # One sort per column serves min, max and every quantile
+    ordered = np.sort(values, axis=0)
+    last = np.maximum(count - 1, 0)
+    low = np.where(count > 0, ordered[0], np.nan)
+    high = ordered[last, np.arange(len(columns))]
+    qs = sorted_quantiles(ordered, count, quantiles)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values, axis=0) / count
+        std = np.sqrt(np.nansum((values - mean) ** 2, axis=0) / count)
+
+    summary = pd.DataFrame({"count": count, "mean": mean, "std": std, "min": low}, index=columns)
+    for q, row in zip(quantiles, qs):
+        summary[f"{q:.0%}"] = row
+    summary["max"] = high
+    corr, counts = pairwise_correlation(values, mean)
+    return StatsResult(summary,
+                       pd.DataFrame(corr, index=columns, columns=columns),
+                       pd.DataFrame(counts, index=columns, columns=columns))
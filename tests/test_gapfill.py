@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import gapfill
+
+COLUMNS = ["a", "b"]
+
+
+def panel(countries=5, years=30, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Country Code": np.repeat([f"C{i}" for i in range(countries)], years),
+        "Time": np.tile(np.arange(1990, 1990 + years), countries).astype(float),
+        **{c: rng.uniform(0, 100, countries * years) for c in COLUMNS},
+    })
+    df[COLUMNS] = df[COLUMNS].mask(rng.random((len(df), len(COLUMNS))) < 0.4)
+    # Shuffled rows: the fill must follow country and year, not row order
+    return df.sample(frac=1, random_state=seed)
+
+
+def per_country_interpolate(df):
+    expected = df.sort_values(["Country Code", "Time"])
+    for col in COLUMNS:
+        expected[col] = expected.groupby("Country Code")[col].transform(
+            lambda s: s.interpolate(method="linear", limit_area="inside"))
+    return expected.loc[df.index]
+
+
+def test_fill_wide_equals_per_country_interpolate():
+    df = panel()
+    filled, imputed = gapfill.fill_wide(df, COLUMNS)
+    expected = per_country_interpolate(df)
+    pd.testing.assert_frame_equal(filled, expected)
+    pd.testing.assert_frame_equal(imputed, df[COLUMNS].isna() & expected[COLUMNS].notna())
+
+
+def test_fill_wide_leaves_rows_without_country_alone():
+    df = panel()
+    df.loc[df.index[:3], "Country Code"] = np.nan
+    filled, imputed = gapfill.fill_wide(df, COLUMNS)
+    pd.testing.assert_frame_equal(filled.loc[df.index[:3]], df.loc[df.index[:3]])
+    assert not imputed.loc[df.index[:3]].to_numpy().any()
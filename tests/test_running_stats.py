@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import frame_cache
+import running_stats
+import stats
+
+COLUMNS = ["a", "b", "c"]
+RANGES = {c: (0, 100) for c in COLUMNS}
+
+
+def panel(countries=6, years=range(1990, 2010), seed=0):
+    rng = np.random.default_rng(seed)
+    years = list(years)
+    df = pd.DataFrame({
+        "Country Code": np.repeat([f"C{i}" for i in range(countries)], len(years)),
+        "Year": np.tile(years, countries).astype(float),
+        **{c: rng.uniform(0, 100, countries * len(years)) for c in COLUMNS},
+    })
+    df[COLUMNS] = df[COLUMNS].mask(rng.random((len(df), len(COLUMNS))) < 0.3)
+    return df
+
+
+def assert_same_state(left, right):
+    for name in ("n", "mean", "m2", "comoment", "minimum", "maximum"):
+        np.testing.assert_allclose(getattr(left, name), getattr(right, name), equal_nan=True, atol=1e-8)
+    np.testing.assert_array_equal(left.sketch, right.sketch)
+
+
+def test_merge_equals_single_pass():
+    df = panel()
+    single = running_stats.RunningStats.from_frame(df, COLUMNS, RANGES)
+    parts = [running_stats.RunningStats.from_frame(df.iloc[i:i + 17], COLUMNS, RANGES)
+             for i in range(0, len(df), 17)]
+    merged = running_stats.combine(parts)
+    assert_same_state(merged, single)
+    expected = stats.describe(df, COLUMNS)
+    pd.testing.assert_frame_equal(merged.correlation(), expected.correlation, atol=1e-10)
+    pd.testing.assert_frame_equal(merged.result().pair_counts, expected.pair_counts)
+
+
+def test_incremental_append_equals_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(frame_cache, "CACHE_DIR", str(tmp_path))
+    full = panel()
+    running_stats.incremental("append", full[full["Year"] < 2000], COLUMNS, version=1)
+    appended = running_stats.incremental("append", full, COLUMNS, version=1)
+    rebuilt = running_stats.incremental("rebuild", full, COLUMNS, version=1)
+    assert sorted(appended) == sorted(rebuilt)
+    for key, rows in full.groupby("Country Code"):
+        expected = running_stats.RunningStats.from_frame(rows, COLUMNS)
+        assert_same_state(appended[key], expected)
+        assert_same_state(rebuilt[key], expected)
+
+
+def test_incremental_revision_rebuilds_country(tmp_path, monkeypatch):
+    monkeypatch.setattr(frame_cache, "CACHE_DIR", str(tmp_path))
+    df = panel()
+    running_stats.incremental("revised", df, COLUMNS, version=1)
+    revised = df.copy()
+    revised.loc[(revised["Country Code"] == "C2") & (revised["Year"] == 1995), "a"] = 50.0
+    store = running_stats.incremental("revised", revised, COLUMNS, version=1)
+    expected = running_stats.RunningStats.from_frame(revised[revised["Country Code"] == "C2"], COLUMNS)
+    assert_same_state(store["C2"], expected)
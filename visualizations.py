@@ -0,0 +1,160 @@
+import streamlit as st
+import artifact_cache
+import charts
+import data_loader
+import datamodel
+import rollup
+
+def _decade_summary(dataset, year_range, key):
+    # Decade averages from the rollup cube, drilling down to the years of one decade
+    cube = data_loader.load_cube(dataset)
+    decades = rollup.table(cube, "decade", years=year_range)
+    st.dataframe(decades.round(2), use_container_width=True)
+    if len(decades):
+        decade = st.selectbox("Drill down into decade", list(decades.index), key=key)
+        st.dataframe(rollup.table(cube, "year", decades=[decade], years=year_range).round(2),
+                     use_container_width=True)
+
+
+def show_visualizations():
+    st.title("Data Visualizations")
+
+    # --- KPI Cards (latest observed value, looked up in the long store) ---
+    long_main = data_loader.load_long("primary")
+    kpi_countries = datamodel.countries(long_main)
+    kpi_country = kpi_countries[0]
+    if len(kpi_countries) > 1:
+        kpi_country = st.selectbox("Country", kpi_countries, key="kpi_country")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Latest Urban Population", f"{datamodel.latest_value(long_main, kpi_country, 'Urban Population'):.2f}%")
+    col2.metric("Latest Unemployment", f"{datamodel.latest_value(long_main, kpi_country, 'Unemployment Rate'):.2f}%")
+    col3.metric("Internet Users", f"{datamodel.latest_value(long_main, kpi_country, 'Internet Users'):.2f}%")
+
+    st.markdown("---")
+    
+    # --- MAIN DATASET VISUALIZATIONS ---
+    st.header("Primary Dataset Analysis")
+    
+    # Year Filter for Main Dataset
+    years_main = data_loader.load_year_index("primary")
+    year_range_main = st.slider("Select Year Range for Primary Data", 
+                               years_main.min_year, 
+                               years_main.max_year,
+                               (years_main.min_year, years_main.max_year),
+                               key="main_year_slider")
+    
+    df_filtered_main = years_main.slice(*year_range_main)
+    fp_main = data_loader.fingerprint("primary")
+
+    # --- Line Plot ---
+    st.subheader("Trends Over Time")
+    fig = charts.cached_chart("line", fp_main, year_range_main, df_filtered_main,
+                              x="Time", y=["Urban Population", "Unemployment Rate", "Internet Users"],
+                              markers=True, title="Urban Population, Unemployment & Internet Users Over Time")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Scatter Plot ---
+    st.subheader("Internet Users vs Urban Population")
+    fig = charts.cached_chart("scatter", fp_main, year_range_main, df_filtered_main,
+                              x="Urban Population", y="Internet Users", color="Time",
+                              size="Unemployment Rate", title="Internet Users vs Urban Population")
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Histogram ---
+    st.subheader("Distribution of Internet Users")
+    fig = charts.cached_chart("histogram", fp_main, year_range_main, df_filtered_main, x="Internet Users", nbins=15, color_discrete_sequence=["#43AA8B"])
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Box Plot ---
+    st.subheader("Unemployment Rate Distribution")
+    fig = charts.cached_chart("box", fp_main, year_range_main, df_filtered_main, y="Unemployment Rate", points="all", color_discrete_sequence=["#43AA8B"])
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Decade Averages ---
+    st.subheader("Average by Decade")
+    _decade_summary("primary", year_range_main, "main_decade")
+
+    # --- Download Button ---
+    cleaned_csv = artifact_cache.get_or_build((fp_main, "cleaned_data.csv"),
+                                              lambda: data_loader.load_primary().to_csv(index=False).encode("utf-8"))
+    st.download_button("Download Cleaned Dataset", cleaned_csv,
+                       "cleaned_data.csv", "text/csv")
+    
+    st.markdown("---")
+    
+    # --- SECONDARY DATASET VISUALIZATIONS ---
+    st.header("Secondary Dataset Analysis")
+    
+    # Year Filter for Secondary Dataset
+    years_sec = data_loader.load_year_index("secondary")
+    year_range_sec = st.slider("Select Year Range for Secondary Data", 
+                              years_sec.min_year, 
+                              years_sec.max_year,
+                              (years_sec.min_year, years_sec.max_year),
+                              key="sec_year_slider")
+    
+    df_filtered_sec = years_sec.slice(*year_range_sec)
+    fp_sec = data_loader.fingerprint("secondary")
+    
+    st.subheader("Secondary Dataset Preview")
+    st.dataframe(df_filtered_sec, use_container_width=True)
+
+    # --- Line Plot (Secondary Dataset) ---
+    st.subheader("Secondary Dataset Trends Over Time")
+    fig = charts.cached_chart(
+        "line", fp_sec, year_range_sec,
+        df_filtered_sec,
+        x="Time",
+        y=["Secondary School Enrollment", "Gini Index", "Female Labor Force Participation"],
+        markers=True,
+        title="Secondary School Enrollment, Gini Index & Female Labor Force Participation Over Time"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Scatter Plot ---
+    st.subheader("Female Labor Force Participation vs Secondary School Enrollment")
+    fig = charts.cached_chart(
+        "scatter", fp_sec, year_range_sec,
+        df_filtered_sec,
+        x="Secondary School Enrollment",
+        y="Female Labor Force Participation",
+        color="Time",
+        size="Gini Index",
+        title="Female Labor Force Participation vs Secondary School Enrollment"
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Histogram ---
+    st.subheader("Distribution of Gini Index")
+    fig = charts.cached_chart(
+        "histogram", fp_sec, year_range_sec,
+        df_filtered_sec,
+        x="Gini Index",
+        nbins=15,
+        color_discrete_sequence=["#43AA8B"]
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Box Plot ---
+    st.subheader("Secondary School Enrollment Distribution")
+    fig = charts.cached_chart(
+        "box", fp_sec, year_range_sec,
+        df_filtered_sec,
+        y="Secondary School Enrollment",
+        points="all",
+        color_discrete_sequence=["#3498DB"]
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+    # --- Decade Averages ---
+    st.subheader("Secondary Dataset Average by Decade")
+    _decade_summary("secondary", year_range_sec, "sec_decade")
+    st.title("Insights & Trends")
+    st.markdown("""
+    ### Key Observations
+    - **Line Plot:** Urban population rises steadily, while internet usage grows sharply.  
+    - **Scatter Plot:** Positive correlation between urban population and internet users.  
+    - **Box Plot:** Unemployment shows wide variability with some high outliers.  
+    - **Histogram:** Internet usage distribution has shifted upward over the years.  
+    """)
+    st.success("Explore other tabs for more details and interactive visualizations!")